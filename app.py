@@ -2,7 +2,6 @@ import streamlit as st
 import config.config as config
 import ui.ui as ui
 import layout.layout as layout
-from datetime import datetime
 
 # Init Streamlit session state
 config.initialize_session_state()
@@ -12,6 +11,9 @@ if "initialized" not in st.session_state:
         st.session_state[k] = v
     st.session_state.initialized = True
 
+# Record timings only if this session turned it on
+layout.apply_profiling_setting()
+
 # Page config
 st.set_page_config(page_title="Freedom 25", layout="wide")
 st.title("🧮 Freedom 25 — Trade Journal")
@@ -19,6 +21,11 @@ st.title("🧮 Freedom 25 — Trade Journal")
 # Step 1: Session-wide config
 ui.session_config_panel()
 layout.show_session_metrics()
+layout.show_performance_metrics()
+layout.show_risk_of_ruin()
+layout.show_trade_history()
+layout.show_journal_filter()
+layout.show_notes_search()
 
 # Init active trades container
 if "active_trades" not in st.session_state:
@@ -26,11 +33,9 @@ if "active_trades" not in st.session_state:
 
 # Add new trade button
 if st.button("➕ Start New Trade"):
-    now = datetime.now()
-    date_str = now.strftime("%d%m%Y")
-    time_str = now.strftime("%H%M")
-    count = len(st.session_state.active_trades) + 1
-    trade_id = f"{date_str}-{time_str}-{count:05d}"
+    # Session-local key; the journal ID is allocated once, when the trade is logged in Step 3
+    st.session_state.trades_started = st.session_state.get("trades_started", 0) + 1
+    trade_id = f"trade-{st.session_state.trades_started}"
 
     st.session_state.active_trades[trade_id] = {
         "stage": 2,
@@ -42,29 +47,46 @@ if st.button("➕ Start New Trade"):
         "data": {}
     }
 
+    st.session_state.active_trade = trade_id
+
     # Collapse session config on first trade
     st.session_state.session_config_collapsed = True
 
-# Render trades in tabs
+# Render only the selected trade; each trade is a fragment so its widgets rerun in isolation
 if st.session_state.active_trades:
     trade_ids = list(st.session_state.active_trades.keys())
-    tabs = st.tabs([f"{i+1}" for i in range(len(trade_ids))])
+    if st.session_state.get("active_trade") not in st.session_state.active_trades:
+        st.session_state.active_trade = trade_ids[-1]
+
+    positions = {tid: i + 1 for i, tid in enumerate(trade_ids)}
+    active_id = st.radio(
+        "Open trades", trade_ids, key="active_trade", horizontal=True,
+        format_func=lambda tid: f"{positions[tid]}", label_visibility="collapsed"
+    )
+    for tid in trade_ids:
+        if tid != active_id:
+            ui.keep_trade_inputs(st.session_state.active_trades[tid], tid)
+    ui.render_trade(st.session_state.active_trades[active_id], active_id)
+
+# Size several simultaneous setups within the portfolio limits
+ui.allocation_panel()
+
+# Unrealized P/L of logged trades from a tick feed
+ui.live_pnl_panel()
 
-    for i, tid in enumerate(trade_ids):
-        trade_state = st.session_state.active_trades[tid]
-        with tabs[i]:
-            st.markdown(f"#### Working on: {tid}")
-            ui.render_trade_setup(trade_state, tid)
-            ui.render_trade_logger(trade_state, tid)
-            ui.render_trade_live_log(trade_state, tid)
-            ui.render_trade_exit_log(trade_state, tid)
+# Setups that were seen but not taken
+ui.missed_trades_panel()
 
 
 # Save session snapshot
-config.save_snapshot({
+snapshot = {
     "balance": st.session_state.balance,
     "risk_percent": st.session_state.risk_percent,
     "max_open_risk": st.session_state.max_open_risk,
     "max_exposure": st.session_state.max_exposure
-})
+}
+config.save_snapshot(snapshot, st.session_state.get("saved_snapshot"))
+st.session_state.saved_snapshot = snapshot
 
+# Timings for this run (collapsed unless opened)
+layout.show_profiling_panel()
@@ -0,0 +1,223 @@
+"""Benchmarks for the journal, sizing, charting and snapshot hot paths.
+
+    python -m benchmarks.run                      # 1k and 100k rows, compare with baselines
+    python -m benchmarks.run --rows 1000000       # add the 1M-row journal
+    python -m benchmarks.run --save               # record new baselines
+
+Each case reports throughput (ops/s) and peak traced memory. With baselines present, a case
+whose throughput drops by more than --tolerance makes the run exit non-zero. The history cases
+report the memory a loaded journal keeps; the run also fails if TradeHistory holds more than
+HISTORY_MEMORY_RATIO of what the same rows take as dicts.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import tracemalloc
+
+import numpy as np
+import pyarrow as pa
+
+import config.config as config
+import layout.charts as charts
+import logic.trade as trade
+import storage.columnar as columnar
+import storage.journal as journal
+from benchmarks.synthetic import write_journal_csv
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+DEFAULT_ROWS = [1_000, 100_000]
+# TradeHistory must hold the journal in at most this fraction of the memory its rows take as dicts
+HISTORY_MEMORY_RATIO = 0.5
+
+
+def _measure(func, ops):
+    """Run func once for timing and once under tracemalloc for peak memory."""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "ops": ops,
+        "seconds": round(elapsed, 6),
+        "ops_per_sec": round(ops / elapsed, 2) if elapsed else None,
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def _resident(build, rows):
+    """Memory still held by build()'s result: traced Python objects plus Arrow buffers."""
+    # The first call pays for lazily imported modules and kernels, which the result does not hold
+    build()
+    arrow_before = pa.total_allocated_bytes()
+    tracemalloc.start()
+    result = build()
+    python_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    arrow_bytes = pa.total_allocated_bytes() - arrow_before
+    del result
+    return {"rows": rows, "resident_kib": round((python_bytes + arrow_bytes) / 1024, 1)}
+
+
+def _entry_data(rng):
+    entry = round(rng.uniform(10, 500), 2)
+    return {
+        "entry_date": "2026-01-01",
+        "entry_time": f"{rng.randint(8, 16):02d}:{rng.randint(0, 59):02d}",
+        "actual_entry": entry,
+        "actual_stop": round(entry * 0.97, 2),
+        "target_tp": round(entry * 1.09, 2),
+        "contribution_pct": rng.randint(1, 25),
+        "instrument": "BENCH",
+    }
+
+
+def run_suite(rows, workdir, seed=25, ops=200):
+    rng = random.Random(seed)
+    csv_path = os.path.join(workdir, f"trades-{rows}.csv")
+    db_path = os.path.join(workdir, f"journal-{rows}.sqlite3")
+
+    write_journal_csv(csv_path, rows, seed)
+    results = {}
+
+    start = time.perf_counter()
+    journal.import_csv(csv_path, db_path)
+    results["import_csv"] = {"ops": rows, "seconds": round(time.perf_counter() - start, 6)}
+
+    results["history_dicts"] = _resident(lambda: list(journal.iter_rows(db_path)), rows)
+    results["history_arrow"] = _resident(lambda: columnar.TradeHistory.from_csv(csv_path), rows)
+
+    with journal.open_journal(db_path) as conn:
+        ids = [r[0] for r in conn.execute('SELECT "ID" FROM trades')]
+    sample_ids = [rng.choice(ids) for _ in range(ops)]
+
+    results["log_trade_entry"] = _measure(
+        lambda: [trade.log_trade_entry(_entry_data(rng), db_path=db_path) for _ in range(ops)], ops
+    )
+    results["update_trade_row"] = _measure(
+        lambda: [trade.update_trade_row(tid, {"Notes": "bench", "Mood": "Calm"}, db_path=db_path) for tid in sample_ids],
+        ops
+    )
+
+    entries = np.array([rng.uniform(10, 500) for _ in range(rows)])
+    stops = entries * np.array([rng.uniform(0.95, 1.05) for _ in range(rows)])
+    pcts = np.array([rng.randint(1, 25) for _ in range(rows)], dtype=float)
+    scalar_n = min(rows, 10_000)
+    results["calculate_trade_details"] = _measure(
+        lambda: [trade.calculate_trade_details(entries[i], stops[i], pcts[i], 10000.0) for i in range(scalar_n)],
+        scalar_n
+    )
+    results["calculate_trade_details_batch"] = _measure(
+        lambda: trade.calculate_trade_details_batch(entries, stops, pcts, 10000.0), rows
+    )
+
+    setups = [
+        {"entry": float(entries[i]), "stop": float(stops[i]), "position_size": 10.0,
+         "direction": trade.infer_direction(entries[i], stops[i])}
+        for i in range(min(ops, 50))
+    ]
+
+    def plot_cold():
+        charts._r_multiple_figure.cache_clear()
+        for s in setups:
+            charts.plot_r_multiple_analysis(s, 10000.0)
+
+    results["plot_r_multiple_analysis_cold"] = _measure(plot_cold, len(setups))
+    results["plot_r_multiple_analysis_cached"] = _measure(
+        lambda: [charts.plot_r_multiple_analysis(s, 10000.0) for s in setups], len(setups)
+    )
+
+    results["snapshot_save"] = _measure(
+        lambda: [config.save_snapshot({"balance": 10000.0 + rng.random(), "risk_percent": 1.0,
+                                       "max_open_risk": 5.0, "max_exposure": 50.0}) for _ in range(ops)],
+        ops
+    )
+    results["snapshot_load"] = _measure(lambda: [config.load_snapshot() for _ in range(ops)], ops)
+
+    return results
+
+
+def _compare(size, results, tolerance):
+    path = os.path.join(BASELINE_DIR, f"{size}.json")
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name, {}).get("ops_per_sec")
+        after = result.get("ops_per_sec")
+        if before and after and after < before * (1 - tolerance):
+            regressions.append(f"{size} rows / {name}: {after:,.0f} ops/s vs baseline {before:,.0f}")
+    return regressions
+
+
+def _check_memory(size, results):
+    arrow, dicts = results["history_arrow"]["resident_kib"], results["history_dicts"]["resident_kib"]
+    if arrow > dicts * HISTORY_MEMORY_RATIO:
+        return [f"{size} rows / history_arrow: {arrow:,.0f} KiB held vs {dicts:,.0f} KiB as dicts"]
+    return []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--ops", type=int, default=200, help="calls per write/plot/snapshot case")
+    parser.add_argument("--seed", type=int, default=25)
+    parser.add_argument("--save", action="store_true", help="write results as the new baselines")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed throughput drop before failing")
+    args = parser.parse_args(argv)
+
+    regressions = []
+    with tempfile.TemporaryDirectory() as workdir:
+        # Keep snapshot writes away from the real data/ directory
+        config.CONFIG_DIR = workdir
+        config.SNAPSHOT_PATH = os.path.join(workdir, "snapshot.json")
+        config.HISTORY_PATH = os.path.join(workdir, "snapshot_history.jsonl")
+
+        for size in args.rows:
+            results = run_suite(size, workdir, args.seed, args.ops)
+
+            print(f"\n== {size:,} rows")
+            for name, r in results.items():
+                if r.get("ops_per_sec"):
+                    rate = f"{r['ops_per_sec']:>12,.0f} ops/s"
+                elif "seconds" in r:
+                    rate = f"{r['seconds']:>10.3f} s total"
+                else:
+                    rate = ""
+                if "peak_kib" in r:
+                    peak = f"{r['peak_kib']:>10,.0f} KiB peak"
+                else:
+                    peak = f"{r['resident_kib']:>10,.0f} KiB held" if "resident_kib" in r else ""
+                print(f"  {name:<34} {rate}  {peak}")
+
+            regressions += _check_memory(size, results)
+            if args.save:
+                os.makedirs(BASELINE_DIR, exist_ok=True)
+                with open(os.path.join(BASELINE_DIR, f"{size}.json"), "w", encoding="utf-8") as f:
+                    json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                               "rows": size, "results": results}, f, indent=2)
+            else:
+                regressions += _compare(size, results, args.tolerance)
+
+    if regressions:
+        print("\nRegressions:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
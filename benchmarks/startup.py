@@ -0,0 +1,80 @@
+"""Cold import time of the app's modules, each measured in a fresh interpreter.
+
+    python -m benchmarks.startup                  # all modules, median of 5 runs
+    python -m benchmarks.startup logic.trade      # just one
+    python -m benchmarks.startup --budget-ms 50   # fail if a headless module is slower
+
+Besides the time, each row lists which heavy libraries the import pulled in. Headless
+modules (everything but the Streamlit UI) must not load Streamlit or Plotly.
+"""
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+HEAVY = ["numpy", "pandas", "pyarrow", "plotly", "streamlit"]
+
+HEADLESS_MODULES = [
+    "logic.trade", "logic.logic", "logic.analytics", "logic.portfolio", "logic.fills",
+    "logic.missed", "logic.montecarlo", "logic.validation", "logic.allocation",
+    "storage.journal", "storage.writer", "storage.storage", "storage.records",
+    "helpers.helpers", "helpers.labels", "helpers.profiling",
+    "config.config", "layout.charts", "cli",
+]
+UI_MODULES = ["layout.layout", "ui.ui"]
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module, runs=5):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+    return {
+        "ms": statistics.median(s["ms"] for s in samples),
+        "loaded": samples[-1]["loaded"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=HEADLESS_MODULES + UI_MODULES)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, help="slowest allowed import for headless modules")
+    args = parser.parse_args(argv)
+
+    failures = []
+    print(f"{'module':<22} {'import':>10}  heavy libraries loaded")
+    for module in args.modules:
+        result = measure(module, args.runs)
+        print(f"{module:<22} {result['ms']:>7.1f} ms  {', '.join(result['loaded']) or '-'}")
+
+        if module in UI_MODULES:
+            continue
+        ui_libs = [m for m in ("streamlit", "plotly") if m in result["loaded"]]
+        if ui_libs:
+            failures.append(f"{module} imports {', '.join(ui_libs)}")
+        if args.budget_ms and result["ms"] > args.budget_ms:
+            failures.append(f"{module} took {result['ms']:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    if failures:
+        print("\nFailures:")
+        for line in failures:
+            print(f"  {line}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+import csv
+import random
+from datetime import date, timedelta
+
+from logic.trade import ENTRY_HEADERS, EXIT_HEADERS
+
+# Step 4 has no shared header list; these are the columns it writes
+LIVE_HEADERS = ["Mood", "Strategy", "Notes"]
+
+INSTRUMENTS = ["AAPL", "MSFT", "TSLA", "NVDA", "EURUSD", "GBPUSD", "BTCUSD", "FTSE100", "GOLD", "OIL"]
+STRATEGIES = ["Breakout", "Pullback", "Range Bounce", "Trend", "Reversal", "Continuation", "News Play", "Volatility Break", "Scalp"]
+MOODS = ["Neutral", "Angry", "Sad", "Bored", "Happy", "Calm", "Greedy", "Tired", "Nervous", "Experimental", "Confident"]
+EXIT_REASONS = ["Take Profit Hit", "Stop Loss Hit", "Trend Exit", "Manual Exit", "Signal Invalidation"]
+WORDS = "breakout volume held support retest momentum faded early late entry chased stop tight wide patience news".split()
+
+
+def _sentence(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def trade_rows(count, seed=25, trades_per_day=40, balance=10000.0):
+    """Yield finalised journal rows in the layout the app writes, IDs unique per day."""
+    rng = random.Random(seed)
+    day = date(2015, 1, 1)
+
+    for i in range(count):
+        if i and i % trades_per_day == 0:
+            day += timedelta(days=1)
+        n = i % trades_per_day + 1
+        hour, minute = 8 + n // 6, (n * 7) % 60
+
+        entry = round(rng.uniform(10, 500), 2)
+        stop = round(entry * rng.uniform(0.95, 1.05), 2) or entry - 1
+        direction = 1 if stop < entry else -1
+        sl = abs(entry - stop) or 0.01
+        target = round(entry + direction * sl * rng.uniform(1, 5), 2)
+        pct = rng.randint(1, 25)
+        size = round(balance * pct / 100 / entry, 2)
+        risk = round(sl * size, 2)
+        actual_rpt = risk / balance * 100
+
+        exit_price = round(entry + direction * sl * rng.uniform(-1.2, 4), 2)
+        pnl = round((exit_price - entry) * size, 2)
+
+        yield [
+            f"{day:%d%m%Y}-{hour:02d}{minute:02d}-{n:05d}", day.isoformat(), f"{hour:02d}:{minute:02d}",
+            rng.choice(INSTRUMENTS), entry, stop, target, pct, size, round(size * entry, 2), risk,
+            balance, 1.0, round(actual_rpt, 2), round(actual_rpt * 100, 2), round(abs(target - entry) / sl, 2),
+            rng.choice(MOODS), rng.choice(STRATEGIES), _sentence(rng, 8),
+            exit_price, f"{hour + 2:02d}:{minute:02d}", rng.choice(EXIT_REASONS),
+            "Profit" if pnl > 0 else "Loss", pnl, round(abs(pnl / risk), 2) if risk else 0,
+            _sentence(rng, 6), _sentence(rng, 6), _sentence(rng, 10)
+        ]
+
+
+def write_journal_csv(path, count, seed=25):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(ENTRY_HEADERS + LIVE_HEADERS + EXIT_HEADERS)
+        writer.writerows(trade_rows(count, seed))
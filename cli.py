@@ -0,0 +1,206 @@
+"""Freedom 25 from the command line, without starting Streamlit.
+
+    python cli.py size setups.csv --balance 10000            # size a batch of setups
+    python cli.py finalise 18102026-0930-00001 --exit-price 104.5 --exit-time 15:10
+    python cli.py import trades.csv                          # append a journal CSV
+    python cli.py import-fills fills.csv --balance 10000     # broker fills -> trades
+    python cli.py export trades.csv
+    python cli.py convert trades.csv                         # legacy CSV -> typed trades.arrow
+    python cli.py validate
+    python cli.py query --strategy Breakout --mood Tired --from 2026-01-01
+    python cli.py search "chased entry"
+
+Setups are CSV or JSON records with entry, stop and contribution_pct, plus optional target_tp
+and instrument columns. Streamlit and Plotly are never imported; pandas only for import-fills,
+pyarrow only for convert.
+"""
+import os
+import sys
+import csv
+import json
+import argparse
+
+import logic.trade as trade
+import storage.journal as journal
+
+SIZE_FIELDS = ["direction", "sl_distance", "position_size", "capital_used", "risk", "r_multiple"]
+
+
+def _read_records(path):
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        if path.endswith(".json"):
+            return json.load(f)
+        return list(csv.DictReader(f))
+
+
+def _float_column(records, key, default=None):
+    values = []
+    for n, record in enumerate(records, start=1):
+        value = record.get(key, "")
+        if value in ("", None):
+            if default is None:
+                raise SystemExit(f"Record {n} has no {key}")
+            value = default
+        values.append(float(value))
+    return values
+
+
+def cmd_size(args):
+    records = _read_records(args.setups)
+    if not records:
+        return 0
+
+    has_target = any(r.get("target_tp") not in ("", None) for r in records)
+    details = trade.calculate_trade_details_batch(
+        _float_column(records, "entry"),
+        _float_column(records, "stop"),
+        _float_column(records, "contribution_pct"),
+        args.balance,
+        target_tps=_float_column(records, "target_tp", default=float("nan")) if has_target else None
+    )
+
+    fieldnames = list(records[0].keys()) + [f for f in SIZE_FIELDS if f not in records[0]]
+    out = open(args.out, "w", newline="", encoding="utf-8") if args.out else sys.stdout
+    try:
+        writer = csv.DictWriter(out, fieldnames=fieldnames, extrasaction="ignore")
+        writer.writeheader()
+        for i, record in enumerate(records):
+            sized = {f: details[f][i].item() for f in SIZE_FIELDS}
+            if sized["r_multiple"] != sized["r_multiple"]:
+                sized["r_multiple"] = ""
+            writer.writerow({**record, **sized})
+    finally:
+        if args.out:
+            out.close()
+    return 0
+
+
+def cmd_finalise(args):
+    try:
+        result, pnl = trade.finalise_trade(
+            args.trade_id, args.exit_price, args.exit_time, args.reason, args.result,
+            {"Closing Notes": args.notes}, db_path=args.db
+        )
+    except ValueError as e:
+        raise SystemExit(str(e))
+    print(f"{args.trade_id}: {result} {pnl:+,.2f}")
+    return 0
+
+
+def cmd_import(args):
+    print(f"Imported {journal.import_csv(args.csv, db_path=args.db):,} rows")
+    return 0
+
+
+def cmd_import_fills(args):
+    import logic.fills as fills
+
+    columns = json.loads(args.columns) if args.columns else None
+    summary = fills.import_fills(args.fills, args.balance, args.max_rpt, columns=columns, db_path=args.db)
+    print(f"Imported {summary['imported']:,} trades, skipped {summary['skipped']:,} already journalled, "
+          f"{summary['open_fills']:,} fills still open")
+    return 0
+
+
+def cmd_export(args):
+    print(f"Exported {journal.export_csv(args.csv, db_path=args.db):,} rows")
+    return 0
+
+
+def cmd_convert(args):
+    import storage.columnar as columnar
+
+    count = columnar.convert_csv(args.csv, args.out)
+    print(f"Converted {count:,} rows to {args.out or os.path.splitext(args.csv)[0] + '.arrow'}")
+    return 0
+
+
+def cmd_validate(args):
+    import logic.validation as validation
+
+    issues = validation.validate_journal(db_path=args.db)
+    for n, trade_id, problem in issues:
+        print(f"row {n} {trade_id or '-'}: {problem}")
+    print(f"{len(issues)} issue(s) found" if issues else "Journal OK")
+    return 1 if issues else 0
+
+
+def cmd_query(args):
+    ids = journal.query_trade_ids(
+        strategy=args.strategy, mood=args.mood, instrument=args.instrument,
+        date_from=args.date_from, date_to=args.date_to, db_path=args.db
+    )
+    for trade_id in ids:
+        print(trade_id)
+    print(f"{len(ids):,} matching trades", file=sys.stderr)
+    return 0
+
+
+def cmd_search(args):
+    for hit in journal.search_notes(args.text, limit=args.limit, db_path=args.db):
+        print(f"{hit['ID']}  {hit['snippet']}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=journal.JOURNAL_DB, help="journal database (default: data/journal.sqlite3)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("size", help="size a file of setups")
+    p.add_argument("setups")
+    p.add_argument("--balance", type=float, required=True)
+    p.add_argument("--out", help="CSV to write (default: stdout)")
+    p.set_defaults(func=cmd_size)
+
+    p = commands.add_parser("finalise", help="record the exit of a logged trade")
+    p.add_argument("trade_id")
+    p.add_argument("--exit-price", type=float, required=True)
+    p.add_argument("--exit-time", required=True)
+    p.add_argument("--result", choices=["Profit", "Loss", "Break-even"], help="default: from the P/L sign")
+    p.add_argument("--reason", default="")
+    p.add_argument("--notes", default="")
+    p.set_defaults(func=cmd_finalise)
+
+    p = commands.add_parser("import", help="append a journal CSV")
+    p.add_argument("csv")
+    p.set_defaults(func=cmd_import)
+
+    p = commands.add_parser("import-fills", help="pair broker fills into finalised trades")
+    p.add_argument("fills")
+    p.add_argument("--balance", type=float, required=True)
+    p.add_argument("--max-rpt", type=float, default=1.0)
+    p.add_argument("--columns", help='JSON map of fill fields to export columns, e.g. {"time": "Date/Time"}')
+    p.set_defaults(func=cmd_import_fills)
+
+    p = commands.add_parser("export", help="write the journal as CSV")
+    p.add_argument("csv", nargs="?", default=journal.TRADES_CSV)
+    p.set_defaults(func=cmd_export)
+
+    p = commands.add_parser("convert", help="convert a journal CSV in any historical layout to Arrow")
+    p.add_argument("csv", nargs="?", default=journal.TRADES_CSV)
+    p.add_argument("--out", help="Arrow file to write (default: the CSV path with .arrow)")
+    p.set_defaults(func=cmd_convert)
+
+    p = commands.add_parser("validate", help="check journal rows for inconsistencies")
+    p.set_defaults(func=cmd_validate)
+
+    p = commands.add_parser("query", help="list the IDs of trades matching every filter")
+    p.add_argument("--strategy", action="append", help="repeat to match any of several values")
+    p.add_argument("--mood", action="append")
+    p.add_argument("--instrument", action="append")
+    p.add_argument("--from", dest="date_from", help="YYYY-MM-DD, inclusive")
+    p.add_argument("--to", dest="date_to", help="YYYY-MM-DD, inclusive")
+    p.set_defaults(func=cmd_query)
+
+    p = commands.add_parser("search", help="full-text search of notes and reflections")
+    p.add_argument("text")
+    p.add_argument("--limit", type=int, default=20)
+    p.set_defaults(func=cmd_search)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,22 @@
 import os
 import json
+import tempfile
+from datetime import datetime
+from helpers.profiling import profiled, add_io
+import logic.portfolio as portfolio
 
 CONFIG_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
 SNAPSHOT_PATH = os.path.join(CONFIG_DIR, 'snapshot.json')
+HISTORY_PATH = os.path.join(CONFIG_DIR, 'snapshot_history.jsonl')
 
+# History compaction: every N appends, bursts of changes closer together than
+# the window (e.g. typing a balance digit by digit) collapse to their last value
+HISTORY_COMPACT_EVERY = 200
+HISTORY_COMPACT_WINDOW = 60
+
+_appends_since_compact = 0
+
+@profiled
 def load_snapshot():
     if not os.path.exists(SNAPSHOT_PATH):
         return {
@@ -12,12 +25,77 @@ def load_snapshot():
             "max_open_risk": 5.0,
             "max_exposure": 50.0
         }
+    add_io(read=os.path.getsize(SNAPSHOT_PATH))
     with open(SNAPSHOT_PATH, 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def save_snapshot(data):
-    with open(SNAPSHOT_PATH, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4)
+def _atomic_write(path, text):
+    # Temp file in the target directory so os.replace never crosses filesystems
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+@profiled
+def save_snapshot(data, last_saved=None):
+    """Persist the session settings atomically; returns False when nothing changed.
+
+    last_saved is what this session saved last, kept per session: sessions with different
+    settings would otherwise rewrite the file for each other on every rerun. Until a session
+    has saved, the file itself is compared.
+    """
+    global _appends_since_compact
+
+    snapshot = dict(data)
+    if snapshot == (load_snapshot() if last_saved is None else last_saved):
+        return False
+
+    os.makedirs(CONFIG_DIR, exist_ok=True)
+    text = json.dumps(snapshot, indent=4)
+    _atomic_write(SNAPSHOT_PATH, text)
+
+    line = json.dumps({"ts": datetime.now().isoformat(timespec="seconds"), **snapshot}) + "\n"
+    with open(HISTORY_PATH, 'a', encoding='utf-8') as f:
+        f.write(line)
+    add_io(written=len(text) + len(line))
+
+    _appends_since_compact += 1
+    if _appends_since_compact >= HISTORY_COMPACT_EVERY:
+        compact_history()
+    return True
+
+
+def load_history():
+    """Balance/settings history as a list of {"ts", ...snapshot} dicts, oldest first."""
+    if not os.path.exists(HISTORY_PATH):
+        return []
+    with open(HISTORY_PATH, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compact_history(window=HISTORY_COMPACT_WINDOW):
+    global _appends_since_compact
+
+    history = load_history()
+    compacted = []
+    for entry in history:
+        if compacted and (datetime.fromisoformat(entry["ts"]) - datetime.fromisoformat(compacted[-1]["ts"])).total_seconds() < window:
+            compacted[-1] = entry
+        else:
+            compacted.append(entry)
+
+    if len(compacted) < len(history):
+        _atomic_write(HISTORY_PATH, "".join(json.dumps(e) + "\n" for e in compacted))
+    _appends_since_compact = 0
+    return len(history) - len(compacted)
 
 def get_initial_session_state():
     snapshot = load_snapshot()
@@ -32,6 +110,7 @@ def get_initial_session_state():
         "trade_counter": 0,
         "open_trades": [],
         "prospective_trade": None,
+        "portfolio": portfolio.PortfolioLedger(),
     }
 
 def initialize_session_state():
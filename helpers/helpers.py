@@ -1,4 +1,3 @@
-import streamlit as st
 from datetime import datetime
 
 def generate_trade_id():
@@ -1,10 +1,43 @@
 # helpers/labels.py
 import json
 import os
+import time
+from helpers.profiling import profiled, add_io
+
+LABELS_PATH = os.path.join(os.path.dirname(__file__), '..', 'config', 'labels.json')
+
+# Seconds between mtime checks; keeps even the stat() off most reruns
+CHECK_INTERVAL = 1.0
+
+# path -> (mtime, checked_at, labels)
+_cache = {}
+
+
+@profiled
+def load_labels(file_path=LABELS_PATH):
+    """Return the parsed labels, re-reading the file only when its mtime changes.
+
+    The returned dict is shared between callers and must not be mutated.
+    """
+    if not os.path.isabs(file_path):
+        file_path = os.path.join(os.path.dirname(__file__), '..', file_path)
+
+    now = time.monotonic()
+    cached = _cache.get(file_path)
+    if cached and now - cached[1] < CHECK_INTERVAL:
+        return cached[2]
 
-def load_labels(file_path="config/labels.json"):
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"Label file not found at {file_path}")
-    
+
+    mtime = os.stat(file_path).st_mtime_ns
+    if cached and cached[0] == mtime:
+        _cache[file_path] = (mtime, now, cached[2])
+        return cached[2]
+
     with open(file_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+        labels = json.load(f)
+    add_io(read=os.path.getsize(file_path))
+
+    _cache[file_path] = (mtime, now, labels)
+    return labels
@@ -0,0 +1,101 @@
+# helpers/profiling.py
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+# FREEDOM25_PROFILE=1 turns timing on at startup for every thread that doesn't choose for
+# itself (see enable); FREEDOM25_PROFILE_LOG=path also appends one JSON line per call to that file
+ENABLED = os.environ.get("FREEDOM25_PROFILE", "") not in ("", "0")
+LOG_PATH = os.environ.get("FREEDOM25_PROFILE_LOG") or None
+
+_stats = {}
+_lock = threading.Lock()
+_local = threading.local()
+_log_file = None
+
+
+def enable(on=True):
+    """Turn timing on or off for the calling thread only, e.g. one session's script run."""
+    _local.enabled = bool(on)
+
+
+def _enabled():
+    return getattr(_local, "enabled", ENABLED)
+
+
+def _record(name, elapsed, read, written):
+    global _log_file
+    with _lock:
+        entry = _stats.setdefault(name, {"calls": 0, "total_ms": 0.0, "max_ms": 0.0, "read": 0, "written": 0})
+        entry["calls"] += 1
+        entry["total_ms"] += elapsed * 1000
+        entry["max_ms"] = max(entry["max_ms"], elapsed * 1000)
+        entry["read"] += read
+        entry["written"] += written
+
+        if LOG_PATH:
+            if _log_file is None:
+                _log_file = open(LOG_PATH, "a", encoding="utf-8", buffering=1)
+            _log_file.write(json.dumps({
+                "ts": time.time(), "name": name, "ms": round(elapsed * 1000, 3),
+                "read": read, "written": written
+            }) + "\n")
+
+
+def add_io(read=0, written=0):
+    """Attribute bytes read/written to every span currently being timed on this thread."""
+    if not _enabled():
+        return
+    for span in getattr(_local, "stack", ()):
+        span[0] += read
+        span[1] += written
+
+
+@contextmanager
+def timed(name):
+    if not _enabled():
+        yield
+        return
+
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    span = [0, 0]
+    stack.append(span)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stack.pop()
+        _record(name, elapsed, span[0], span[1])
+
+
+def profiled(func):
+    """Time every call of func under its qualified name; a single flag check when disabled."""
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled():
+            return func(*args, **kwargs)
+        with timed(name):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def stats():
+    with _lock:
+        rows = [{"name": name, **entry} for name, entry in _stats.items()]
+    for row in rows:
+        row["mean_ms"] = row["total_ms"] / row["calls"]
+    return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+
+def reset():
+    with _lock:
+        _stats.clear()
@@ -1,25 +1,53 @@
-import plotly.graph_objects as go
+from functools import lru_cache
+import storage.journal as journal
 import logic.trade as trade
+from helpers.profiling import profiled
+
+# numpy and Plotly are imported on first use so pages without a chart don't pay for them
+
+FIGURE_CACHE_SIZE = 64
+
+
+@lru_cache(maxsize=1)
+def r_values():
+    import numpy as np
+
+    # Finer resolution for smooth curve tracking: R 1.00 → 5.00 in 0.01 steps
+    values = np.round(np.linspace(1.0, 5.0, 401), 10)
+    values.flags.writeable = False
+    return values
+
+
+def r_multiple_curve(entry, stop, position_size, direction, balance):
+    import numpy as np
 
-def plot_r_multiple_analysis(trade_data, balance):
-    entry = trade_data["entry"]
-    stop = trade_data["stop"]
-    position_size = trade_data["position_size"]
     sl_distance = abs(entry - stop)
-    direction = trade_data["direction"]
+    sign = 1.0 if direction == "Long" else -1.0
 
-    # Finer resolution for smooth curve tracking
-    r_values = list(trade.frange(1.0, 5.0, 0.01))
-    tp_values = []
-    profits = []
-    profit_pcts = []
+    tp_values = entry + sign * r_values() * sl_distance
+    profits = np.abs(tp_values - entry) * position_size
+    profit_pcts = (profits / balance) * 100
+    return r_values(), np.round(tp_values, 4), profits, profit_pcts
 
-    for r in r_values:
-        tp = entry + (r * sl_distance) if direction == "Long" else entry - (r * sl_distance)
-        tp_values.append(round(tp, 4))
-        profit = abs(tp - entry) * position_size
-        profits.append(profit)
-        profit_pcts.append((profit / balance) * 100)
+
+@profiled
+def plot_r_multiple_analysis(trade_data, balance):
+    # Figures are cached on their inputs so unchanged trade tabs reuse them across reruns
+    return _r_multiple_figure(
+        float(trade_data["entry"]),
+        float(trade_data["stop"]),
+        float(trade_data["position_size"]),
+        trade_data["direction"],
+        float(balance)
+    )
+
+
+@lru_cache(maxsize=FIGURE_CACHE_SIZE)
+def _r_multiple_figure(entry, stop, position_size, direction, balance):
+    import numpy as np
+    import plotly.graph_objects as go
+
+    r_values, tp_values, profits, profit_pcts = r_multiple_curve(entry, stop, position_size, direction, balance)
 
     fig = go.Figure()
 
@@ -31,7 +59,7 @@ def plot_r_multiple_analysis(trade_data, balance):
         name="Profit (£)",
         yaxis="y1",
         xaxis="x1",
-        customdata=list(zip(tp_values, profit_pcts)),
+        customdata=np.column_stack((tp_values, profit_pcts)),
         hovertemplate=(
             "R: %{x:.2f}<br>"
             "TP: £%{customdata[0]:.2f}<br>"
@@ -84,7 +112,7 @@ def plot_r_multiple_analysis(trade_data, balance):
             title="Take Profit (£)",
             overlaying="x",
             side="top",
-            tickvals=r_values[::50],
+            tickvals=r_values[::50].tolist(),
             ticktext=[f"{tp:.2f}" for tp in tp_values[::50]],
             showgrid=False,
             showline=True
@@ -101,7 +129,7 @@ def plot_r_multiple_analysis(trade_data, balance):
             title="Profit (% Balance)",
             overlaying="y",
             side="right",
-            tickvals=profits[::50],
+            tickvals=profits[::50].tolist(),
             ticktext=[f"{p:.2f}%" for p in profit_pcts[::50]],
             showgrid=False,
             showline=True
@@ -115,3 +143,224 @@ def plot_r_multiple_analysis(trade_data, balance):
     )
 
     return fig
+
+
+# Stop x allocation grid for the Step 2 sensitivity heatmap
+SENSITIVITY_STOPS = 200
+# The Step 2 slider: 0-25 % of balance in 1 % steps
+SENSITIVITY_CONTRIBUTIONS = tuple(range(0, 26))
+# Narrowest stop range shown, as a fraction of entry; doubled until the current stop fits
+SENSITIVITY_SPAN = 0.05
+
+
+def sensitivity_span(entry, stop, direction):
+    # Stepped rather than fitted to the stop, so editing the stop rarely changes the grid
+    span = SENSITIVITY_SPAN
+    if entry <= 0:
+        return span
+    while span < abs(entry - stop) / entry * 1.25:
+        span *= 2
+    if direction == "Long":
+        # Long stops run down towards zero; the last row stays one step above it
+        span = min(span, 1 - 1 / SENSITIVITY_STOPS)
+    return span
+
+
+@lru_cache(maxsize=FIGURE_CACHE_SIZE)
+def sensitivity_grid(entry, balance, direction, span):
+    """Sizing for every stop x allocation pair, in one batch call; stops run from entry out to span x entry."""
+    import numpy as np
+
+    sign = -1.0 if direction == "Long" else 1.0
+    stops = entry * (1 + sign * np.linspace(span / SENSITIVITY_STOPS, span, SENSITIVITY_STOPS))
+    contributions = np.array(SENSITIVITY_CONTRIBUTIONS, dtype=float)
+    details = trade.calculate_trade_details_batch(entry, stops[:, None], contributions[None, :], balance)
+
+    shape = (len(stops), len(contributions))
+    grid = {
+        "stops": stops,
+        "contributions": contributions,
+        "risk": details["risk"],
+        "risk_pct": details["risk"] / balance * 100,
+        "position_size": np.broadcast_to(details["position_size"], shape),
+    }
+    # Shared between sessions through the cache
+    for values in grid.values():
+        values.flags.writeable = False
+    return grid
+
+
+def _sensitivity_figure(grid, max_rpt):
+    import numpy as np
+    import plotly.graph_objects as go
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        leverage = np.where(grid["risk_pct"] > 0, max_rpt / grid["risk_pct"], np.nan)
+
+    fig = go.Figure()
+    fig.add_trace(go.Heatmap(
+        x=grid["contributions"],
+        y=grid["stops"],
+        z=grid["risk_pct"],
+        zmin=0,
+        zmid=max_rpt,
+        colorscale="RdYlGn_r",
+        colorbar=dict(title="Risk (%)"),
+        customdata=np.dstack((grid["position_size"], grid["risk"], leverage)),
+        hovertemplate=(
+            "Allocation: %{x:.0f}%<br>"
+            "Stop: %{y:.4f}<br>"
+            "Risk: £%{customdata[1]:,.2f} (%{z:.2f}%)<br>"
+            "Position Size: %{customdata[0]:,.2f}<br>"
+            "Ideal Leverage: %{customdata[2]:.1f}×<extra></extra>"
+        ),
+        name="Risk (%)"
+    ))
+
+    # Where risk equals max risk per trade (ideal leverage 1×)
+    fig.add_trace(go.Contour(
+        x=grid["contributions"],
+        y=grid["stops"],
+        z=grid["risk_pct"],
+        contours=dict(start=max_rpt, end=max_rpt, size=1, coloring="none"),
+        line=dict(color="black", width=2, dash="dash"),
+        showscale=False,
+        hoverinfo="skip",
+        name=f"Max RPT ({max_rpt:.2f}%)"
+    ))
+
+    # Current setup; moved in place by plot_stop_sensitivity
+    fig.add_trace(go.Scatter(
+        x=[], y=[], mode="markers", name="Current setup",
+        marker=dict(symbol="x", size=12, color="black"),
+        hovertemplate="Current: %{x:.0f}% at %{y:.4f}<extra></extra>"
+    ))
+
+    fig.update_layout(
+        title="🌡️ Stop × Allocation Sensitivity",
+        height=450,
+        margin=dict(t=60, b=50, l=60, r=60),
+        xaxis=dict(title="Capital Allocation (% of balance)", dtick=5),
+        yaxis=dict(title="Stop Loss"),
+        legend=dict(x=0.5, xanchor="center", y=-0.3, orientation="h")
+    )
+    return fig
+
+
+@profiled
+def plot_stop_sensitivity(trade_data, balance, max_rpt, figures):
+    """Heatmap of risk % over stop x allocation, with the current setup marked.
+
+    figures is a dict owned by the caller (one per trade slot) that keeps the built figure; it is
+    rebuilt only when entry, balance, direction, stop range or max RPT change, so moving the
+    allocation slider or the stop within the range only moves the marker.
+    """
+    entry = float(trade_data["entry"])
+    stop = float(trade_data["stop"])
+    key = (entry, float(balance), trade_data["direction"], sensitivity_span(entry, stop, trade_data["direction"]), float(max_rpt))
+
+    if figures.get("key") != key:
+        figures["key"] = key
+        figures["figure"] = _sensitivity_figure(sensitivity_grid(*key[:4]), key[4])
+
+    fig = figures["figure"]
+    fig.data[-1].update(x=[trade_data["contribution_pct"]], y=[stop])
+    return fig
+
+
+# History scatter: above this many points in total, keep the min and max R per date bucket, with
+# each category's bucket count in proportion to its share of the trades
+HISTORY_MAX_POINTS = 20_000
+HISTORY_BUCKETS = 1_500
+HISTORY_CACHE_SIZE = 8
+
+
+def min_max_downsample(x, y, buckets=HISTORY_BUCKETS):
+    """Indices of the lowest and highest y in each of `buckets` equal-width x ranges, in x order.
+
+    Outliers survive, so the cloud keeps its envelope while the point count is capped at 2 * buckets.
+    """
+    import numpy as np
+
+    if len(x) <= 2 * buckets:
+        return np.arange(len(x))
+
+    span = x.max() - x.min()
+    bucket = ((x - x.min()) * (buckets - 1) // span).astype(np.int64) if span else np.zeros(len(x), np.int64)
+
+    order = np.lexsort((y, bucket))
+    sorted_buckets = bucket[order]
+    starts = np.flatnonzero(np.r_[True, sorted_buckets[1:] != sorted_buckets[:-1]])
+    ends = np.r_[starts[1:], len(order)] - 1
+    keep = np.unique(np.concatenate([order[starts], order[ends]]))
+    return keep[np.argsort(x[keep], kind="stable")]
+
+
+def _category_labels(values, labels, color_by):
+    # Moods are stored without their emoji; show them as they appear in labels.json. Other
+    # labels are stored as shown, and may contain spaces themselves ("Range Bounce")
+    by_name = {label.split(" ", 1)[-1]: label for label in labels} if color_by == "Mood" else {}
+    return [by_name.get(v, v) if v else "Unlabelled" for v in values]
+
+
+@profiled
+def plot_r_history(color_by="Strategy", labels=None, db_path=journal.JOURNAL_DB):
+    """WebGL scatter of every finalised trade's signed R against its date, one trace per category."""
+    import storage.columnar as columnar
+
+    labels = labels or {}
+    order = labels.get("moods" if color_by == "Mood" else "strategies", [])
+    return _r_history_figure(columnar.synced_version(db_path), color_by, tuple(order), db_path)
+
+
+@lru_cache(maxsize=HISTORY_CACHE_SIZE)
+def _r_history_figure(version, color_by, order, db_path):
+    import numpy as np
+    import plotly.graph_objects as go
+    import storage.columnar as columnar
+
+    table = columnar.load_columns(["ID", "Date", "P/L", "Final R-Multiple", color_by], db_path=db_path)
+    dates = table["Date"].to_numpy(zero_copy_only=False).astype("datetime64[D]")
+    pnl = table["P/L"].to_numpy(zero_copy_only=False)
+    r = table["Final R-Multiple"].to_numpy(zero_copy_only=False)
+
+    finalised = ~np.isnat(dates) & ~np.isnan(r) & ~np.isnan(pnl)
+    # Step 5 stores |R|; the sign comes from P/L
+    r = np.copysign(np.abs(r), pnl)[finalised]
+    dates = dates[finalised]
+    days = dates.astype(np.int64)
+    ids = np.array(table["ID"].to_pylist(), dtype=object)[finalised]
+    categories = np.array(_category_labels(table[color_by].to_pylist(), order, color_by), dtype=object)[finalised]
+
+    present = set(categories.tolist())
+    names = [c for c in order if c in present] + sorted(present - set(order))
+
+    fig = go.Figure()
+    shown = 0
+    for name in names:
+        rows = np.flatnonzero(categories == name)
+        if len(r) > HISTORY_MAX_POINTS:
+            buckets = max(1, HISTORY_MAX_POINTS * len(rows) // len(r) // 2)
+            rows = rows[min_max_downsample(days[rows], r[rows], buckets)]
+        shown += len(rows)
+        fig.add_trace(go.Scattergl(
+            x=dates[rows],
+            y=r[rows],
+            mode="markers",
+            name=name,
+            customdata=ids[rows],
+            marker=dict(size=5, opacity=0.7),
+            hovertemplate="%{x|%Y-%m-%d}<br>R: %{y:.2f}<br>%{customdata}<extra>" + name + "</extra>"
+        ))
+
+    fig.add_hline(y=0, line_width=1, line_color="grey")
+    fig.update_layout(
+        title=f"🗺️ R-Multiple History by {color_by}",
+        height=450,
+        margin=dict(t=60, b=50, l=60, r=60),
+        xaxis=dict(title="Date"),
+        yaxis=dict(title="R-Multiple"),
+        legend=dict(orientation="h", y=-0.2),
+        meta={"trades": int(len(r)), "shown": shown}
+    )
+    return fig
@@ -1,5 +1,12 @@
 import streamlit as st
+from functools import wraps
 from helpers.helpers import calculate_monetary_risk
+import logic.analytics as analytics
+import logic.montecarlo as montecarlo
+import layout.charts as charts
+import storage.journal as journal
+from helpers.labels import load_labels
+import helpers.profiling as profiling
 
 def show_session_metrics():
     balance = st.session_state.get("balance", 0.0)
@@ -26,4 +33,201 @@ def show_session_metrics():
         col3.metric("📉 Max Open Risk", f"{st.session_state.max_open_risk:.2f}%")
         col4.metric("📈 Max Exposure", f"{st.session_state.max_exposure:.2f}%")
 
-    st.session_state.session_metrics_expanded = metrics_expanded
\ No newline at end of file
+        # Headroom from the portfolio ledger as of this full run; edits inside a trade fragment
+        # only rerun that trade, whose Step 2 exposure summary shows the live projection
+        room = st.session_state.portfolio.headroom(
+            balance, st.session_state.max_open_risk, st.session_state.max_exposure
+        )
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("🧯 Open Risk", f"£{room['open_risk']:,.2f}")
+        col2.metric("🛟 Risk Headroom", f"£{room['risk_headroom']:,.2f}",
+                    delta=f"{room['risk_headroom'] / balance * 100:.2f}%" if balance else None)
+        col3.metric("🏦 Exposure", f"£{room['exposure']:,.2f}")
+        col4.metric("🛟 Exposure Headroom", f"£{room['exposure_headroom']:,.2f}",
+                    delta=f"{room['exposure_headroom'] / balance * 100:.2f}%" if balance else None)
+        st.caption("Headroom as of the last page run. Step 2 shows it live for the trade being edited.")
+
+    st.session_state.session_metrics_expanded = metrics_expanded
+
+def show_performance_metrics():
+    tracker = analytics.refresh(st.session_state.get("performance_tracker"))
+    st.session_state.performance_tracker = tracker
+    stats = tracker.summary()
+
+    with st.expander("🏁 Performance Overview", expanded=False):
+        if not stats["trades"]:
+            st.info("No finalised trades yet. Results appear here once a trade is saved in Step 5.")
+            return
+
+        col1, col2, col3, col4, col5 = st.columns(5)
+        col1.metric("🧾 Closed Trades", f"{stats['trades']}")
+        col2.metric("🏆 Win Rate", f"{stats['win_rate']:.1f}%")
+        col3.metric("🎲 Expectancy", f"{stats['expectancy']:.2f}R")
+        col4.metric("💰 Total P/L", f"£{stats['total_pnl']:,.2f}")
+        col5.metric("📉 Max Drawdown", f"£{stats['max_drawdown']:,.2f}")
+
+        col1, col2 = st.columns(2)
+        col1.markdown("**Equity Curve (£ P/L)**")
+        col1.line_chart(stats["equity_curve"])
+        col2.markdown("**R-Multiple Distribution**")
+        col2.bar_chart(
+            [{"R": k, "Trades": v} for k, v in stats["r_distribution"].items()],
+            x="R", y="Trades"
+        )
+
+
+@st.cache_data(max_entries=32, show_spinner="Simulating equity paths…")
+def _risk_of_ruin(_trades, version, risk_pct, n_paths, n_trades, ruin_pct, target_pct):
+    # Keyed on the tracker's journal version rather than hashing every trade's R on each rerun
+    history = [r for _, r in _trades.values()]
+    return montecarlo.simulate(history, risk_pct, n_paths, n_trades, ruin_pct, target_pct)
+
+
+def show_risk_of_ruin():
+    tracker = st.session_state.get("performance_tracker")
+    finalised = len(tracker.trades) if tracker else 0
+
+    with st.expander("🎰 Risk of Ruin (Monte Carlo)", expanded=False):
+        if finalised < 5:
+            st.info("At least 5 finalised trades are needed to bootstrap equity paths.")
+            return
+
+        col1, col2, col3, col4 = st.columns(4)
+        n_trades = col2.number_input("Trades per path", min_value=10, max_value=1_000, value=100, step=10, key="mc_trades")
+        # Longer paths allow fewer of them, so one run stays within montecarlo.MAX_CELLS
+        max_paths = min(1_000_000, montecarlo.MAX_CELLS // n_trades // 1_000 * 1_000)
+        st.session_state.mc_paths = min(st.session_state.get("mc_paths", 10_000), max_paths)
+        n_paths = col1.number_input("Paths", min_value=1_000, max_value=max_paths, step=1_000, key="mc_paths")
+        ruin_pct = col3.number_input("Ruin (% of balance lost)", min_value=1.0, max_value=100.0, value=50.0, step=5.0, key="mc_ruin")
+        target_pct = col4.number_input("Target (% growth)", min_value=1.0, value=100.0, step=10.0, key="mc_target")
+
+        results = _risk_of_ruin(
+            tracker.trades, tracker.version, st.session_state.risk_percent, n_paths, n_trades, ruin_pct, target_pct
+        )
+        st.caption(
+            f"{results['paths']:,} paths of {results['trades']} trades, resampled from {finalised:,} "
+            f"finalised trades at {st.session_state.risk_percent:.2f}% risk per trade."
+        )
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("☠️ Risk of Ruin", f"{results['risk_of_ruin']:.2f}%")
+        col2.metric("🎯 Reach Target", f"{results['target_probability']:.1f}%")
+        median = results["median_trades_to_target"]
+        col3.metric("⏳ Median Trades to Target", f"{median:.0f}" if median is not None else "—")
+        col4.metric("📈 Median Final Equity", f"{results['final_equity_percentiles'][50]:+.1f}%")
+
+        st.markdown("**Max Drawdown Percentiles**")
+        st.dataframe(
+            [{"Percentile": f"P{p}", "Max Drawdown (%)": round(v, 2)} for p, v in results["drawdown_percentiles"].items()],
+            hide_index=True, use_container_width=True
+        )
+
+
+def show_trade_history():
+    with st.expander("🗺️ Trade History", expanded=False):
+        # The figure is built and sent only on request; a collapsed expander still runs its body
+        if not st.toggle("Show chart", key="history_show_chart"):
+            return
+        color_by = st.radio("Colour by", ["Strategy", "Mood"], horizontal=True, key="history_color_by")
+        fig = charts.plot_r_history(color_by, load_labels())
+        stats = fig.layout.meta
+        if not stats["trades"]:
+            st.info("No finalised trades yet.")
+            return
+
+        if stats["shown"] < stats["trades"]:
+            st.caption(f"{stats['trades']:,} trades, thinned to the {stats['shown']:,} highest and lowest R per date range.")
+        st.plotly_chart(fig, use_container_width=True)
+
+
+# Matching trades listed in the filter panel, newest first
+FILTER_ROWS = 200
+
+
+def show_journal_filter():
+    with st.expander("🔎 Journal Filter", expanded=False):
+        col1, col2, col3 = st.columns(3)
+        strategies = col1.multiselect("Strategy", journal.indexed_values("Strategy"), key="filter_strategy")
+        moods = col2.multiselect("Mood", journal.indexed_values("Mood"), key="filter_mood")
+        instruments = col3.multiselect("Instrument", journal.indexed_values("Instrument"), key="filter_instrument")
+
+        col1, col2 = st.columns(2)
+        date_from = col1.date_input("From", value=None, key="filter_from")
+        date_to = col2.date_input("To", value=None, key="filter_to")
+        # Nothing to narrow by: skip querying and listing the whole journal on every rerun
+        if not (strategies or moods or instruments or date_from or date_to):
+            return
+
+        ids = journal.query_trade_ids(
+            strategy=strategies or None,
+            mood=moods or None,
+            instrument=instruments or None,
+            date_from=str(date_from) if date_from else None,
+            date_to=str(date_to) if date_to else None
+        )
+        if not ids:
+            st.info("No trades match these filters.")
+            return
+
+        shown = f", latest {FILTER_ROWS} shown" if len(ids) > FILTER_ROWS else ""
+        st.caption(f"{len(ids):,} matching trades{shown}.")
+        st.dataframe(journal.get_trades(reversed(ids[-FILTER_ROWS:])), hide_index=True, use_container_width=True)
+
+
+def show_notes_search():
+    with st.expander("🔍 Search Notes", expanded=False):
+        text = st.text_input("Search notes and reflections", key="notes_search", placeholder="e.g. chased entry")
+        if not text.strip():
+            return
+
+        hits = journal.search_notes(text)
+        if not hits:
+            st.info("No notes match.")
+            return
+
+        st.caption(f"{len(hits)} best matching trades.")
+        for hit in hits:
+            st.markdown(f"**{hit['ID']}** — {hit['snippet']}")
+
+
+def apply_profiling_setting():
+    # Runs and fragment reruns can land on different threads, so each applies this session's toggle
+    profiling.enable(st.session_state.get("profiling_enabled", profiling.ENABLED))
+
+
+def session_profiled(func):
+    """profiled for fragment bodies, which rerun without the top of app.py applying the toggle."""
+    timed_func = profiling.profiled(func)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        apply_profiling_setting()
+        return timed_func(*args, **kwargs)
+
+    return wrapper
+
+
+def show_profiling_panel():
+    with st.expander("⏱️ Performance", expanded=False):
+        # Read back by apply_profiling_setting at the start of every run of this session
+        st.toggle("Record timings", value=profiling.ENABLED, key="profiling_enabled")
+
+        rows = profiling.stats()
+        if not rows:
+            st.caption("No timings recorded yet. Enable recording and interact with the app.")
+            return
+
+        st.dataframe(
+            [{
+                "Call": r["name"],
+                "Calls": r["calls"],
+                "Total (ms)": round(r["total_ms"], 2),
+                "Mean (ms)": round(r["mean_ms"], 3),
+                "Max (ms)": round(r["max_ms"], 2),
+                "Read (B)": r["read"],
+                "Written (B)": r["written"],
+            } for r in rows],
+            hide_index=True, use_container_width=True
+        )
+        if st.button("🧹 Reset timings", key="profiling_reset"):
+            profiling.reset()
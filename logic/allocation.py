@@ -0,0 +1,124 @@
+from helpers.profiling import profiled
+from logic.trade import calculate_trade_details_batch
+
+# Same upper bound as the Step 2 allocation slider
+MAX_CONTRIBUTION_PCT = 25.0
+# Allocations are rounded down to this step of balance
+CONTRIBUTION_STEP = 0.01
+# Position sizes are rounded to this many units (calculate_trade_details_batch rounds to 2 dp)
+SIZE_INCREMENT = 0.01
+# Prices of open risk tried per round, and rounds narrowing in on the one that fills the limit
+LAMBDA_GRID = 129
+REFINE_ROUNDS = 3
+
+
+def expected_r(r_multiples, convictions):
+    """Expected R of each setup, reading conviction (0-1) as the chance of reaching target first."""
+    import numpy as np
+    r_multiples = np.nan_to_num(np.asarray(r_multiples, dtype=float))
+    convictions = np.clip(np.asarray(convictions, dtype=float), 0.0, 1.0)
+    return convictions * r_multiples - (1 - convictions)
+
+
+def _exposure_fill(score, upper, exposure_room):
+    """Greedy fill of the exposure limit for every row of score: best score per % allocated first."""
+    import numpy as np
+    order = np.argsort(-score, axis=1, kind="stable")
+    u = np.where(np.take_along_axis(score, order, axis=1) > 0, upper[order], 0.0)
+    # Past the setup that fills the limit the room left goes negative, which clips to zero
+    fill = np.clip(np.minimum(u, exposure_room - (np.cumsum(u, axis=1) - u)), 0.0, None)
+    allocation = np.zeros_like(score)
+    np.put_along_axis(allocation, order, fill, axis=1)
+    return allocation
+
+
+def _lagrangian_fill(value, cost, upper, risk_room, exposure_room):
+    """Allocation maximising value within both limits (an LP with two coupling constraints).
+
+    Open risk gets a price lam: for a fixed lam the exposure limit alone is filled greedily, and the
+    risk used falls as lam rises. A grid of lam values is filled at once and narrowed to the pair that
+    brackets the risk limit; blending those two fills meets it exactly.
+    """
+    import numpy as np
+    low_fill = _exposure_fill(value[None, :], upper, exposure_room)[0]
+    if low_fill @ cost <= risk_room:
+        return low_fill
+
+    # At the highest value per unit of risk every score is <= 0 and nothing is allocated
+    low, high = 0.0, float(np.max(value[upper > 0] / cost[upper > 0]))
+    high_fill = np.zeros_like(value)
+    for _ in range(REFINE_ROUNDS):
+        lams = np.linspace(low, high, LAMBDA_GRID)
+        fills = _exposure_fill(value - lams[:, None] * cost, upper, exposure_room)
+        k = int(np.argmax(fills @ cost <= risk_room))
+        low, high, low_fill, high_fill = lams[k - 1], lams[k], fills[k - 1], fills[k]
+
+    low_risk, high_risk = low_fill @ cost, high_fill @ cost
+    share = (risk_room - high_risk) / (low_risk - high_risk)
+    return share * low_fill + (1 - share) * high_fill
+
+
+def _fit_to_limits(entries, stops, targets, contribution_pct, balance, max_risk, risk_room, exposure_room):
+    """Size the allocation, stepping it down where rounding the position size up breaks a limit.
+
+    Each step removes one whole size increment, which on a high-priced instrument can be several %
+    of balance. Every pass lowers at least one allocation and all-zero always fits, so it ends.
+    """
+    import numpy as np
+    # % of balance that moves the rounded position size by one increment
+    step = np.maximum(np.ceil(SIZE_INCREMENT * entries / balance * 100 / CONTRIBUTION_STEP), 1) * CONTRIBUTION_STEP
+    while True:
+        details = calculate_trade_details_batch(entries, stops, contribution_pct, balance, target_tps=targets)
+        over = details["risk"] > max_risk + 1e-9
+        risk_over = details["risk"].sum() > risk_room + 1e-9
+        if not over.any() and (risk_over or details["capital_used"].sum() > exposure_room + 1e-9):
+            # Over a total only: trim the allocated setup whose increment frees the most of it
+            freed = np.abs(entries - stops) if risk_over else entries
+            over[int(np.argmax(np.where(contribution_pct > 0, freed, -1.0)))] = True
+        if not over.any():
+            return contribution_pct, details
+        contribution_pct = np.where(over, np.maximum(contribution_pct - step, 0.0), contribution_pct)
+
+
+@profiled
+def optimise_allocation(entries, stops, targets, convictions, balance, risk_per_trade_pct, max_open_risk_pct,
+                        max_exposure_pct, open_risk=0.0, exposure=0.0, max_contribution_pct=MAX_CONTRIBUTION_PCT):
+    """Contribution % per candidate setup maximising total expected R, weighted by the risk taken.
+
+    Limits: each setup risks at most risk_per_trade_pct and allocates at most max_contribution_pct of
+    balance; together they stay within what max_open_risk_pct and max_exposure_pct leave after the
+    open_risk and exposure (in money) already committed. Setups with no positive expectancy get 0.
+    """
+    import numpy as np
+    entries = np.asarray(entries, dtype=float)
+    stops = np.asarray(stops, dtype=float)
+    targets = np.asarray(targets, dtype=float)
+
+    # Risk taken per % of balance allocated, as a % of balance
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cost = np.where(entries > 0, np.abs(entries - stops) / entries, 0.0)
+        r_multiple = np.where(cost > 0, np.abs(targets - entries) / np.abs(entries - stops), np.nan)
+        upper = np.where(cost > 0, np.minimum(max_contribution_pct, risk_per_trade_pct / cost), 0.0)
+
+    edge = expected_r(r_multiple, convictions)
+    upper = np.where(edge > 0, upper, 0.0)
+    risk_room = max(max_open_risk_pct - open_risk / balance * 100, 0.0) if balance > 0 else 0.0
+    exposure_room = max(max_exposure_pct - exposure / balance * 100, 0.0) if balance > 0 else 0.0
+
+    if risk_room > 0 and exposure_room > 0 and upper.any():
+        allocation = _lagrangian_fill(edge * cost, cost, upper, risk_room, exposure_room)
+    else:
+        allocation = np.zeros_like(entries)
+    contribution_pct = np.floor(allocation / CONTRIBUTION_STEP + 1e-9) * CONTRIBUTION_STEP
+
+    contribution_pct, details = _fit_to_limits(
+        entries, stops, targets, contribution_pct, balance, balance * risk_per_trade_pct / 100,
+        balance * risk_room / 100, balance * exposure_room / 100
+    )
+    return {
+        **details,
+        "contribution_pct": np.round(contribution_pct, 2),
+        "expected_r": np.round(edge, 2),
+        "risk_headroom_pct": risk_room,
+        "exposure_headroom_pct": exposure_room,
+    }
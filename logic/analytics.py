@@ -0,0 +1,210 @@
+import os
+import json
+import math
+import tempfile
+
+import storage.journal as journal
+
+ANALYTICS_PATH = os.path.join(journal.DATA_DIR, 'analytics.json')
+
+R_BUCKET = 0.5
+
+RESULT_COLUMNS = ["P/L", "Final R-Multiple"]
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _log_path(state_path):
+    # One [seq, pnl, r] line per finalisation; a later line for the same seq supersedes earlier ones
+    return os.path.splitext(state_path)[0] + ".jsonl"
+
+
+class PerformanceTracker:
+    """Running equity, win rate, expectancy, drawdown and R-distribution over finalised trades."""
+
+    def __init__(self, state=None, trades=None):
+        state = state or {}
+        self.version = state.get("version", 0)
+        # Bytes of the trade log folded into the aggregates
+        self.offset = state.get("offset", 0)
+        self.count = state.get("count", 0)
+        self.wins = state.get("wins", 0)
+        self.total_pnl = state.get("total_pnl", 0.0)
+        self.total_r = state.get("total_r", 0.0)
+        self.r_distribution = {float(k): v for k, v in state.get("r_distribution", {}).items()}
+        # _seq -> [pnl, r] in finalisation order
+        self.trades = trades or {}
+        self.peak = 0.0
+        self.max_drawdown = 0.0
+        self.equity_curve = []
+        self._curve_stale = bool(self.trades)
+
+    def _fold(self, pnl, r, sign):
+        self.wins += sign * (pnl > 0)
+        self.total_pnl += sign * pnl
+        self.total_r += sign * r
+
+        bucket = math.floor(r / R_BUCKET) * R_BUCKET
+        self.r_distribution[bucket] = self.r_distribution.get(bucket, 0) + sign
+        if not self.r_distribution[bucket]:
+            del self.r_distribution[bucket]
+
+    def _rebuild_curve(self):
+        # Re-finalising an earlier trade shifts every later equity point; rebuilt once, vectorised
+        import numpy as np
+
+        pnl = np.fromiter((p for p, _ in self.trades.values()), dtype=float, count=len(self.trades))
+        equity = np.cumsum(pnl)
+        peaks = np.maximum.accumulate(np.concatenate(([0.0], equity)))[1:]
+        self.equity_curve = np.round(equity, 2).tolist()
+        self.peak = float(peaks[-1]) if len(peaks) else 0.0
+        self.max_drawdown = float((peaks - equity).max()) if len(peaks) else 0.0
+        self._curve_stale = False
+
+    def add(self, key, pnl, r):
+        """Record a finalised trade; returns False when it is already recorded with these results."""
+        previous = self.trades.get(key)
+        if previous == [pnl, r]:
+            return False
+        self.trades[key] = [pnl, r]
+
+        if previous is not None:
+            self._fold(*previous, -1)
+            self._curve_stale = True
+        else:
+            self.count += 1
+        self._fold(pnl, r, 1)
+
+        if not self._curve_stale:
+            self.equity_curve.append(round(self.total_pnl, 2))
+            self.peak = max(self.peak, self.total_pnl)
+            self.max_drawdown = max(self.max_drawdown, self.peak - self.total_pnl)
+        return True
+
+    def summary(self):
+        if self._curve_stale:
+            self._rebuild_curve()
+        return {
+            "trades": self.count,
+            "win_rate": (self.wins / self.count * 100) if self.count else 0.0,
+            "expectancy": (self.total_r / self.count) if self.count else 0.0,
+            "total_pnl": self.total_pnl,
+            "max_drawdown": self.max_drawdown,
+            "equity_curve": self.equity_curve,
+            "r_distribution": dict(sorted(self.r_distribution.items())),
+        }
+
+    def to_state(self):
+        return {
+            "version": self.version,
+            "offset": self.offset,
+            "count": self.count,
+            "wins": self.wins,
+            "total_pnl": self.total_pnl,
+            "total_r": self.total_r,
+            "r_distribution": self.r_distribution,
+        }
+
+
+def _read_state(state_path):
+    if not os.path.exists(state_path):
+        return {}
+    with open(state_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _read_log(state_path, start, end):
+    with open(_log_path(state_path), "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    # One json.loads over the whole span is several times faster than one per line
+    return json.loads("[" + data.decode("utf-8").rstrip("\n").replace("\n", ",") + "]")
+
+
+def load_tracker(state_path=ANALYTICS_PATH):
+    state = _read_state(state_path)
+    if "offset" not in state:
+        # Nothing saved yet, or saved before the trade log existed: rebuild from the journal
+        return PerformanceTracker()
+    try:
+        lines = _read_log(state_path, 0, state["offset"])
+    except FileNotFoundError:
+        return PerformanceTracker()
+    trades = {}
+    for seq, pnl, r in lines:
+        trades[seq] = [pnl, r]
+    return PerformanceTracker(state, trades)
+
+
+def save_tracker(tracker, lines, state_path=ANALYTICS_PATH):
+    """Append the changed [seq, pnl, r] lines to the trade log, then commit the aggregates.
+
+    Callers hold the journal write lock so sessions never interleave their saves.
+    """
+    # Anything past the recorded offset is from a save that crashed before committing; overwrite it
+    with open(_log_path(state_path), "r+b" if tracker.offset else "wb") as f:
+        f.seek(tracker.offset)
+        f.truncate()
+        f.write("".join(json.dumps(line) + "\n" for line in lines).encode("utf-8"))
+        f.flush()
+        os.fsync(f.fileno())
+        tracker.offset = f.tell()
+
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(state_path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(tracker.to_state(), f)
+        os.replace(temp_path, state_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _catch_up(tracker, state_path):
+    # Fold in trades another session logged since this tracker last saved or loaded
+    state = _read_state(state_path)
+    if state.get("offset", 0) <= tracker.offset:
+        return
+    for seq, pnl, r in _read_log(state_path, tracker.offset, state["offset"]):
+        tracker.add(seq, pnl, r)
+    tracker.offset = state["offset"]
+    tracker.version = max(tracker.version, state["version"])
+
+
+def _finalised(rows):
+    for row in rows:
+        pnl = _to_float(row.get("P/L"))
+        r = _to_float(row.get("Final R-Multiple"))
+        if pnl is None or r is None:
+            continue
+        # Step 5 stores |R|; the sign comes from P/L
+        yield [row[journal.SEQ_COLUMN], pnl, math.copysign(abs(r), pnl)]
+
+
+def refresh(tracker=None, db_path=journal.JOURNAL_DB, state_path=ANALYTICS_PATH):
+    """Fold journal rows changed since the tracker's last version into the running aggregates."""
+    tracker = tracker or load_tracker(state_path)
+    rows = journal.changed_rows(tracker.version, RESULT_COLUMNS, db_path=db_path)
+    if not rows:
+        return tracker
+    if all(tracker.trades.get(seq) == [pnl, r] for seq, pnl, r in _finalised(rows)):
+        # Notes and other edits move the version without changing any result; nothing to save
+        tracker.version = rows[-1][journal.VERSION_COLUMN]
+        return tracker
+
+    with journal.open_journal(db_path, write=True):
+        _catch_up(tracker, state_path)
+        # Reread under the lock so a concurrent session cannot log newer results than these
+        rows = journal.changed_rows(tracker.version, RESULT_COLUMNS, db_path=db_path)
+        changed = [line for line in _finalised(rows) if tracker.add(*line)]
+        if rows:
+            tracker.version = rows[-1][journal.VERSION_COLUMN]
+        if changed:
+            save_tracker(tracker, changed, state_path)
+    return tracker
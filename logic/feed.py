@@ -0,0 +1,168 @@
+import abc
+import csv
+import asyncio
+import threading
+from datetime import datetime
+
+# Ticks handed to the consumer at once; bounds latency when replaying flat out
+MAX_BATCH = 1_000
+# Ticks due within this many seconds of each other are delivered together
+BATCH_WINDOW = 0.005
+
+
+class PriceFeed(abc.ABC):
+    """Source of ticks for LivePrices."""
+
+    @abc.abstractmethod
+    def batches(self):
+        """Async generator of [(symbol, price, time), ...] lists.
+
+        A symbol of None means the price applies to every open trade.
+        """
+
+
+class ReplayFeed(PriceFeed):
+    """Replay a local tick CSV (time, price and optional symbol columns) at `speed` x real time.
+
+    speed=0 replays as fast as the consumer keeps up.
+    """
+
+    def __init__(self, path, speed=1.0, time_column="time", price_column="price", symbol_column="symbol"):
+        self.path = path
+        self.speed = speed
+        self.time_column = time_column
+        self.price_column = price_column
+        self.symbol_column = symbol_column
+
+    async def batches(self):
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        first = None
+        batch = []
+
+        with open(self.path, "r", newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            has_symbol = self.symbol_column in (reader.fieldnames or [])
+
+            for row in reader:
+                try:
+                    price = float(row[self.price_column])
+                except (TypeError, ValueError):
+                    continue
+                tick_time = datetime.fromisoformat(row[self.time_column])
+                first = first or tick_time
+
+                if self.speed > 0:
+                    delay = started + (tick_time - first).total_seconds() / self.speed - loop.time()
+                    if delay > BATCH_WINDOW:
+                        if batch:
+                            yield batch
+                            batch = []
+                        await asyncio.sleep(delay)
+
+                batch.append((row[self.symbol_column] if has_symbol else None, price, tick_time))
+                if len(batch) >= MAX_BATCH:
+                    yield batch
+                    batch = []
+                    # Let the loop breathe between full batches when replaying flat out
+                    await asyncio.sleep(0)
+
+        if batch:
+            yield batch
+
+
+class LivePrices:
+    """Latest price per symbol, filled by a feed running on its own event-loop thread."""
+
+    def __init__(self):
+        self.prices = {}
+        self.ticks = 0
+        self.last_time = None
+        self.error = None
+        self._lock = threading.Lock()
+        self._loop = None
+        self._task = None
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, feed):
+        # Returns only once any previous feed thread has exited, so its ticks can't leak into this run
+        self.stop()
+        self.error = None
+        self._loop = asyncio.new_event_loop()
+        self._task = self._loop.create_task(self._consume(feed))
+        self._thread = threading.Thread(target=_run, args=(self._loop, self._task), name="price-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            try:
+                # Cancelling interrupts a replay waiting for its next tick
+                self._loop.call_soon_threadsafe(self._task.cancel)
+            except RuntimeError:
+                pass  # The feed ran out and its loop is already closed
+            self._thread.join()
+        self._thread = None
+
+    async def _consume(self, feed):
+        try:
+            async for batch in feed.batches():
+                # Only the last tick per symbol in a batch matters
+                latest = {symbol: price for symbol, price, _ in batch}
+                with self._lock:
+                    self.prices.update(latest)
+                    self.ticks += len(batch)
+                    self.last_time = batch[-1][2]
+        except Exception as e:
+            self.error = e
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.prices), self.ticks, self.last_time
+
+
+def _run(loop, task):
+    """Feed thread body: run the consumer until it ends or is cancelled, then close the loop."""
+    try:
+        loop.run_until_complete(task)
+    except asyncio.CancelledError:
+        pass
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+
+def unrealized(positions, prices):
+    """Unrealized P/L, current R and distance to stop/target (% of price) for every open position at once.
+
+    positions holds dicts with symbol, entry, stop, target and size. Positions without a price get NaN.
+    """
+    import numpy as np
+
+    if not positions:
+        return {}
+
+    fallback = prices.get(None, np.nan)
+    price = np.array([prices.get(p["symbol"], fallback) for p in positions], dtype=float)
+    entry = np.array([p["entry"] for p in positions], dtype=float)
+    stop = np.array([p["stop"] for p in positions], dtype=float)
+    target = np.array([p.get("target") or np.nan for p in positions], dtype=float)
+    size = np.array([p["size"] for p in positions], dtype=float)
+
+    sign = np.where(stop < entry, 1.0, -1.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        move = (price - entry) * sign
+        r = np.where(entry != stop, move / np.abs(entry - stop), np.nan)
+        to_stop = (price - stop) * sign / price * 100
+        to_target = (target - price) * sign / price * 100
+
+    return {
+        "price": price,
+        "pnl": np.round(move * size, 2),
+        "r": np.round(r, 2),
+        "to_stop_pct": np.round(to_stop, 2),
+        "to_target_pct": np.round(to_target, 2),
+    }
@@ -0,0 +1,197 @@
+import hashlib
+
+import storage.journal as journal
+from logic.trade import ENTRY_HEADERS, EXIT_HEADERS
+from helpers.profiling import profiled
+
+CHUNK_ROWS = 100_000
+
+# Canonical fill field -> column name in the broker export; pass overrides to import_fills
+DEFAULT_COLUMNS = {
+    "time": "time",
+    "symbol": "symbol",
+    "side": "side",
+    "quantity": "quantity",
+    "price": "price",
+    "stop": "stop",
+    "fill_id": "fill_id",
+}
+BUY_SIDES = {"BUY", "B", "BOT", "BOUGHT", "LONG"}
+
+# Exit Reason and the reflections are left blank; a broker export has no source for them
+IMPORT_HEADERS = ENTRY_HEADERS + EXIT_HEADERS
+
+
+def _normalise(chunk, columns):
+    import numpy as np
+    import pandas as pd
+    qty = pd.to_numeric(chunk[columns["quantity"]], errors="coerce").astype(float)
+    if columns["side"] in chunk:
+        is_buy = chunk[columns["side"]].astype(str).str.strip().str.upper().isin(BUY_SIDES)
+        qty = qty.abs() * np.where(is_buy, 1.0, -1.0)
+
+    return pd.DataFrame({
+        "time": pd.to_datetime(chunk[columns["time"]]),
+        "symbol": chunk[columns["symbol"]].astype(str),
+        "qty": qty,
+        "price": pd.to_numeric(chunk[columns["price"]], errors="coerce").astype(float),
+        "stop": pd.to_numeric(chunk[columns["stop"]], errors="coerce").astype(float)
+        if columns["stop"] in chunk else np.nan,
+        "fill_id": chunk[columns["fill_id"]].astype(str) if columns["fill_id"] in chunk else "",
+    }).dropna(subset=["qty", "price"])
+
+
+def _positions(fills):
+    # Rounded so fractional quantities still net out to exactly flat
+    pos = fills.groupby("symbol", sort=False)["qty"].cumsum().round(8)
+    return pos, (pos - fills["qty"]).round(8)
+
+
+def _split_reversals(fills):
+    """Split fills that flip a position through zero into a closing and an opening part."""
+    import numpy as np
+    import pandas as pd
+    pos, before = _positions(fills)
+    crossing = (before != 0) & (pos != 0) & (np.sign(pos) != np.sign(before))
+    if not crossing.any():
+        return fills
+
+    order = np.arange(len(fills)) * 2
+    closing = fills[crossing].assign(qty=-before[crossing])
+    opening = fills[crossing].assign(qty=pos[crossing], fill_id=fills["fill_id"][crossing].astype(str) + "#open")
+    return pd.concat([
+        fills[~crossing].assign(_order=order[~crossing.to_numpy()]),
+        closing.assign(_order=order[crossing.to_numpy()]),
+        opening.assign(_order=order[crossing.to_numpy()] + 1),
+    ]).sort_values("_order", kind="stable").drop(columns="_order").reset_index(drop=True)
+
+
+def pair_round_trips(fills):
+    """Group fills into flat-to-flat round trips per symbol.
+
+    Returns one row per completed trip and the fills of trips still open, which must be
+    prepended to the next chunk.
+    """
+    import numpy as np
+    import pandas as pd
+    fills = _split_reversals(fills.reset_index(drop=True))
+    pos, before = _positions(fills)
+    trip = (before == 0).groupby(fills["symbol"], sort=False).cumsum()
+    keys = [fills["symbol"], trip]
+
+    complete = (pos == 0).groupby(keys, sort=False).transform("any")
+    done = fills[complete]
+    if done.empty:
+        return pd.DataFrame(), fills[~complete]
+
+    direction = done["qty"].groupby(keys, sort=False).transform("first").pipe(np.sign)
+    size = done["qty"].abs()
+    is_entry = np.sign(done["qty"]) == direction
+    parts = done.assign(
+        direction=direction,
+        entry_qty=np.where(is_entry, size, 0.0),
+        entry_notional=np.where(is_entry, size * done["price"], 0.0),
+        exit_qty=np.where(is_entry, 0.0, size),
+        exit_notional=np.where(is_entry, 0.0, size * done["price"]),
+    )
+    trips = parts.groupby([parts["symbol"], trip[complete]], sort=False).agg(
+        symbol=("symbol", "first"),
+        direction=("direction", "first"),
+        entry_time=("time", "min"),
+        exit_time=("time", "max"),
+        first_fill=("fill_id", "first"),
+        stop=("stop", "first"),
+        entry_qty=("entry_qty", "sum"),
+        entry_notional=("entry_notional", "sum"),
+        exit_qty=("exit_qty", "sum"),
+        exit_notional=("exit_notional", "sum"),
+    ).reset_index(drop=True)
+    return trips, fills[~complete]
+
+
+def _trade_ids(trips, id_prefix):
+    import pandas as pd
+    # Deterministic so re-importing the same export never duplicates a trade; the
+    # "F" prefix keeps it apart from the allocator's numeric per-day counters
+    keys = (trips["symbol"] + "|" + trips["entry_time"].astype(str) + "|"
+            + trips["first_fill"].astype(str) + "|" + trips["entry_qty"].astype(str))
+    digests = [hashlib.sha1(k.encode()).hexdigest()[:8] for k in keys]
+    return id_prefix + "-F" + pd.Series(digests, index=trips.index)
+
+
+def journal_rows(trips, balance, max_rpt=1.0):
+    """Journal columns for completed round trips, computed the way Steps 3 and 5 do."""
+    import numpy as np
+    import pandas as pd
+    entry = trips["entry_notional"] / trips["entry_qty"]
+    exit_price = trips["exit_notional"] / trips["exit_qty"]
+    size = trips["entry_qty"]
+    stop = trips["stop"]
+
+    used = (size * entry).round(2)
+    risk = ((entry - stop).abs() * size).round(2)
+    actual_rpt = risk / balance * 100
+    pnl = ((exit_price - entry) * size * trips["direction"]).round(2)
+    final_r = np.where(risk > 0, (pnl / risk).abs().round(2), np.where(risk.isna(), np.nan, 0.0))
+
+    # One strftime pass for the date, time and ID prefix
+    stamps = trips["entry_time"].dt.strftime("%Y-%m-%d %H:%M %d%m%Y-%H%M").str.split(" ", expand=True)
+
+    rows = pd.DataFrame({
+        "ID": _trade_ids(trips, stamps[2]),
+        "Date": stamps[0],
+        "Time": stamps[1],
+        "Instrument": trips["symbol"],
+        "Actual Entry": entry.round(4),
+        "Actual Stop": stop,
+        "Target TP": np.nan,
+        "Capital Allocation (%)": (used / balance * 100).round(2),
+        "Position Size": size,
+        "Used": used,
+        "Risk": risk,
+        "Balance": balance,
+        "Max RPT (%)": round(max_rpt, 2),
+        "Actual RPT (%)": actual_rpt.round(2),
+        "Divergence (%)": (actual_rpt / max_rpt * 100).round(2) if max_rpt > 0 else 0.0,
+        "R-Multiple": np.nan,
+        "Exit Price": exit_price.round(4),
+        "Exit Time": trips["exit_time"].dt.strftime("%H:%M"),
+        "Result": np.select([pnl > 0, pnl < 0], ["Profit", "Loss"], "Break-even"),
+        "P/L": pnl,
+        "Final R-Multiple": final_r,
+    }, columns=IMPORT_HEADERS)
+    # Missing values are stored as empty cells, as csv.writer would
+    return rows.astype(object).where(rows.notna(), None)
+
+
+@profiled
+def import_fills(fills_path, balance, max_rpt=1.0, columns=None, chunk_rows=CHUNK_ROWS, db_path=journal.JOURNAL_DB):
+    """Stream a broker fills CSV into the journal as finalised trades, in one transaction.
+
+    Only fills of still-open round trips are carried between chunks, so memory stays flat
+    regardless of file size. Trades whose ID is already in the journal are skipped.
+    """
+    import pandas as pd
+    columns = {**DEFAULT_COLUMNS, **(columns or {})}
+    carry = None
+    imported = skipped = 0
+
+    with journal.open_journal(db_path, write=True) as conn:
+        for chunk in pd.read_csv(fills_path, chunksize=chunk_rows):
+            fills = _normalise(chunk, columns)
+            if carry is not None and not carry.empty:
+                fills = pd.concat([carry, fills], ignore_index=True)
+
+            trips, carry = pair_round_trips(fills)
+            if trips.empty:
+                continue
+
+            rows = journal_rows(trips, balance, max_rpt)
+            existing = journal.existing_ids(conn, rows["ID"])
+            new = rows[~rows["ID"].isin(existing)]
+            if not new.empty:
+                journal.write_rows(conn, IMPORT_HEADERS, new.itertuples(index=False, name=None))
+            imported += len(new)
+            skipped += len(rows) - len(new)
+
+    return {"imported": imported, "skipped": skipped, "open_fills": 0 if carry is None else len(carry)}
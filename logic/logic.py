@@ -1,25 +1,43 @@
 from datetime import datetime
-import os
-import csv
+
+import storage.journal as journal
+import storage.storage as storage
 
 def calculate_position_size(risk_amount, entry_price, stop_loss_price, max_capital):
-    sl_distance = abs(entry_price - stop_loss_price)
-    if sl_distance == 0:
-        return 0, 0, 0
+    size, capital, risk = calculate_position_size_batch([risk_amount], [entry_price], [stop_loss_price], [max_capital])
+    return float(size[0]), float(capital[0]), float(risk[0])
 
-    ideal_size = risk_amount / sl_distance
-    capital_required = ideal_size * entry_price
+def calculate_position_size_batch(risk_amounts, entry_prices, stop_loss_prices, max_capitals):
+    import numpy as np
+    risk_amounts = np.asarray(risk_amounts, dtype=float)
+    entry_prices = np.asarray(entry_prices, dtype=float)
+    stop_loss_prices = np.asarray(stop_loss_prices, dtype=float)
+    max_capitals = np.asarray(max_capitals, dtype=float)
 
-    if capital_required > max_capital:
-        capped_size = max_capital / entry_price
+    sl_distance = np.abs(entry_prices - stop_loss_prices)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ideal_size = risk_amounts / sl_distance
+        capital_required = ideal_size * entry_prices
+        capped = capital_required > max_capitals
+        capped_size = max_capitals / entry_prices
         risk_at_capped = capped_size * sl_distance
-        return capped_size, max_capital, risk_at_capped
-    else:
-        return ideal_size, capital_required, risk_amount
 
-def log_trade(trade_data: dict, session_data: dict, decision: str):
+    size = np.where(capped, capped_size, ideal_size)
+    capital = np.where(capped, max_capitals, capital_required)
+    risk = np.where(capped, risk_at_capped, risk_amounts)
+
+    # Zero stop distance cannot be sized
+    no_stop = sl_distance == 0
+    return (
+        np.where(no_stop, 0.0, size),
+        np.where(no_stop, 0.0, capital),
+        np.where(no_stop, 0.0, risk)
+    )
+
+def log_trade(trade_data: dict, session_data: dict, decision: str, db_path=journal.JOURNAL_DB):
+    """Journal a sized setup in the legacy lowercase layout; returns the trade ID."""
     row = {
-        "date": str(datetime.date.today()),
+        "date": datetime.now().strftime("%Y-%m-%d"),
         "time": trade_data.get("time", ""),
         "decision": decision,
         "entry": trade_data["entry"],
@@ -35,12 +53,5 @@ def log_trade(trade_data: dict, session_data: dict, decision: str):
         "max_open_risk": session_data["max_open_risk"],
         "max_exposure": session_data["max_exposure"]
     }
-
-    filepath = os.path.join("data", "trades.csv")
-    file_exists = os.path.isfile(filepath)
-
-    with open(filepath, "a", newline="") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=row.keys())
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow(row)
+    # Mapped onto the journal columns through records.LEGACY_ALIASES
+    return storage.save_trade(row, db_path=db_path)
@@ -0,0 +1,176 @@
+import os
+import csv
+from datetime import datetime
+
+import storage.journal as journal
+from logic.trade import calculate_trade_details
+from helpers.profiling import profiled, add_io
+
+MISSED_TRADES_CSV = os.path.join(journal.DATA_DIR, "missed_trades.csv")
+
+MISSED_HEADERS = [
+    "Date", "Time", "Instrument", "Direction",
+    "Entry", "Stop", "Target TP", "Contribution (%)",
+    "Position Size", "Capital Used", "Risk", "R-Multiple", "Balance", "Reason", "Logged At"
+]
+
+# Bars scanned per missed trade before it is reported as still open
+DEFAULT_HORIZON = 500
+# Upper bound on trades x bars held in memory at once
+BLOCK_CELLS = 2_000_000
+
+
+def log_missed_trade(trade_data, balance, path=MISSED_TRADES_CSV):
+    """Append a missed setup, sized the same way as a live trade in Step 2."""
+    calc = calculate_trade_details(
+        entry=float(trade_data["entry"]),
+        stop=float(trade_data["stop"]),
+        contribution_pct=float(trade_data["contribution_pct"]),
+        balance=balance,
+        target_tp=float(trade_data["target_tp"])
+    )
+
+    row = [
+        trade_data["entry_date"],
+        trade_data["entry_time"],
+        trade_data.get("instrument", ""),
+        calc["direction"],
+        trade_data["entry"],
+        trade_data["stop"],
+        trade_data["target_tp"],
+        trade_data["contribution_pct"],
+        calc["position_size"],
+        calc["capital_used"],
+        calc["risk"],
+        calc["r_multiple"],
+        balance,
+        trade_data.get("reason", ""),
+        datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    ]
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_header = not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        if write_header:
+            writer.writerow(MISSED_HEADERS)
+        writer.writerow(["" if v is None else v for v in row])
+    add_io(written=sum(len(str(v)) for v in row))
+
+    return calc
+
+
+def load_missed_trades(path=MISSED_TRADES_CSV):
+    import pandas as pd
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return pd.DataFrame(columns=MISSED_HEADERS)
+    return pd.read_csv(path)
+
+
+def load_bars(path):
+    """Read an OHLC bar file (CSV or Parquet) with time, open, high, low, close and optional symbol columns."""
+    import pandas as pd
+    bars = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+    bars.columns = [str(c).strip().lower() for c in bars.columns]
+    bars["time"] = pd.to_datetime(bars["time"])
+    return bars.sort_values("time", kind="stable").reset_index(drop=True)
+
+
+def _first_hits(start, stop, target, is_long, low, high, horizon):
+    """Index offset of the first bar touching the stop and the target (horizon when never)."""
+    import numpy as np
+    n_bars = len(low)
+    stop_at = np.full(len(start), horizon)
+    target_at = np.full(len(start), horizon)
+    block = max(1, BLOCK_CELLS // horizon)
+
+    for i in range(0, len(start), block):
+        s = slice(i, i + block)
+        idx = start[s, None] + np.arange(horizon)
+        in_range = idx < n_bars
+        idx = np.minimum(idx, n_bars - 1)
+        lows, highs = low[idx], high[idx]
+        longs = is_long[s, None]
+
+        stop_hit = in_range & np.where(longs, lows <= stop[s, None], highs >= stop[s, None])
+        target_hit = in_range & np.where(longs, highs >= target[s, None], lows <= target[s, None])
+        stop_at[s] = np.where(stop_hit.any(axis=1), stop_hit.argmax(axis=1), horizon)
+        target_at[s] = np.where(target_hit.any(axis=1), target_hit.argmax(axis=1), horizon)
+
+    return stop_at, target_at
+
+
+@profiled
+def simulate_outcomes(missed, bars, horizon=DEFAULT_HORIZON):
+    """Replay every missed trade against the bars at once and report which level hit first.
+
+    Bars are scanned from the first one at or after the trade's date and time. A bar that
+    touches both stop and target counts as a stop, since the order inside it is unknown.
+    Trades that hit neither within the horizon are marked "Open" at the last close.
+    """
+    import numpy as np
+    import pandas as pd
+    out = missed.copy()
+    out["Outcome"] = "No Data"
+    out["Exit Time"] = pd.NaT
+    out["Bars Held"] = np.nan
+    out["Simulated R"] = np.nan
+    if missed.empty or bars.empty:
+        return out
+
+    entry_time = pd.to_datetime(missed["Date"].astype(str) + " " + missed["Time"].astype(str))
+    groups = bars.groupby("symbol", sort=False) if "symbol" in bars else [(None, bars)]
+
+    for symbol, sym_bars in groups:
+        rows = (missed["Instrument"].astype(str) == str(symbol)).to_numpy() if symbol is not None \
+            else np.ones(len(missed), dtype=bool)
+        if not rows.any():
+            continue
+
+        times = sym_bars["time"].to_numpy()
+        low = sym_bars["low"].to_numpy(dtype=float)
+        high = sym_bars["high"].to_numpy(dtype=float)
+        close = sym_bars["close"].to_numpy(dtype=float)
+
+        entry = missed["Entry"].to_numpy(dtype=float)[rows]
+        stop = missed["Stop"].to_numpy(dtype=float)[rows]
+        target = missed["Target TP"].to_numpy(dtype=float)[rows]
+        is_long = stop < entry
+        start = np.searchsorted(times, entry_time.to_numpy()[rows], side="left")
+
+        stop_at, target_at = _first_hits(start, stop, target, is_long, low, high, horizon)
+        stopped = (stop_at < horizon) & (stop_at <= target_at)
+        targeted = (target_at < horizon) & ~stopped
+        has_bars = start < len(times)
+
+        exit_at = np.where(stopped, stop_at, np.where(targeted, target_at, horizon - 1))
+        last = np.minimum(start + exit_at, len(times) - 1)
+        risk_per_unit = np.abs(entry - stop)
+        sign = np.where(is_long, 1.0, -1.0)
+        exit_price = np.where(stopped, stop, np.where(targeted, target, close[last]))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = np.where(risk_per_unit > 0, (exit_price - entry) * sign / risk_per_unit, np.nan)
+
+        idx = out.index[rows]
+        out.loc[idx, "Outcome"] = np.where(
+            ~has_bars, "No Data", np.where(stopped, "Stop", np.where(targeted, "Target", "Open"))
+        )
+        out.loc[idx, "Exit Time"] = np.where(has_bars, times[last], np.datetime64("NaT"))
+        out.loc[idx, "Bars Held"] = np.where(has_bars, last - start + 1, np.nan)
+        out.loc[idx, "Simulated R"] = np.where(has_bars, np.round(r, 2), np.nan)
+
+    return out
+
+
+def summarize_outcomes(simulated):
+    done = simulated[simulated["Outcome"] != "No Data"]
+    r = done["Simulated R"].dropna()
+    return {
+        "trades": len(done),
+        "targets": int((done["Outcome"] == "Target").sum()),
+        "stops": int((done["Outcome"] == "Stop").sum()),
+        "open": int((done["Outcome"] == "Open").sum()),
+        "total_r": float(r.sum()),
+        "expectancy": float(r.mean()) if len(r) else 0.0,
+    }
@@ -0,0 +1,87 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from helpers.profiling import profiled
+
+# Path x trade cells per generated block (about 16 MB per array); each block has its own seed,
+# so results don't depend on the pool
+CHUNK_CELLS = 2_000_000
+# Most path x trade cells one simulation may generate, which bounds its run time
+MAX_CELLS = 50_000_000
+# Below this many paths the pool start-up costs more than it saves
+POOL_MIN_PATHS = 50_000
+
+DRAWDOWN_PERCENTILES = (50, 75, 95, 99)
+
+
+def _simulate_chunk(history, risk_pct, n_trades, ruin_level, target_level, seed, n_paths):
+    """Bootstrap n_paths compounding equity paths (starting at 1.0) and reduce each to its statistics."""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    r = np.asarray(history)[rng.integers(0, len(history), size=(n_paths, n_trades))]
+    equity = np.cumprod(np.maximum(1.0 + r * (risk_pct / 100), 0.0), axis=1)
+
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)
+    max_drawdown = ((peak - equity) / peak).max(axis=1) * 100
+
+    ruined = (equity <= ruin_level).any(axis=1)
+    reached = equity >= target_level
+    hit_target = reached.any(axis=1)
+    trades_to_target = np.where(hit_target, reached.argmax(axis=1) + 1, -1)
+
+    # Copied so the block's full equity array isn't kept alive until every block is done
+    return ruined, max_drawdown, trades_to_target, equity[:, -1].copy()
+
+
+def _chunks(n_paths, n_trades, seed):
+    import numpy as np
+    per_chunk = max(CHUNK_CELLS // n_trades, 1)
+    sizes = [per_chunk] * (n_paths // per_chunk)
+    if n_paths % per_chunk:
+        sizes.append(n_paths % per_chunk)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    return list(zip(seeds, sizes))
+
+
+def _simulate(history, risk_pct, n_paths, n_trades, ruin_pct, target_pct, seed):
+    import numpy as np
+    ruin_level = 1 - ruin_pct / 100
+    target_level = 1 + target_pct / 100
+    args = [(history, risk_pct, n_trades, ruin_level, target_level, s, n) for s, n in _chunks(n_paths, n_trades, seed)]
+
+    if n_paths >= POOL_MIN_PATHS and len(args) > 1 and (os.cpu_count() or 1) > 1:
+        # spawn: the Streamlit server and journal writer run threads that must not be forked
+        with ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn")) as pool:
+            parts = list(pool.map(_simulate_chunk, *zip(*args)))
+    else:
+        parts = [_simulate_chunk(*a) for a in args]
+
+    ruined, max_drawdown, trades_to_target, final_equity = (np.concatenate(p) for p in zip(*parts))
+    hit = trades_to_target[trades_to_target > 0]
+
+    return {
+        "paths": n_paths,
+        "trades": n_trades,
+        "risk_of_ruin": float(ruined.mean() * 100),
+        "drawdown_percentiles": {p: float(v) for p, v in zip(DRAWDOWN_PERCENTILES, np.percentile(max_drawdown, DRAWDOWN_PERCENTILES))},
+        "target_probability": float(len(hit) / n_paths * 100),
+        "median_trades_to_target": float(np.median(hit)) if len(hit) else None,
+        "p90_trades_to_target": float(np.percentile(hit, 90)) if len(hit) else None,
+        "final_equity_percentiles": {p: float(v) for p, v in zip((5, 50, 95), np.percentile(final_equity, (5, 50, 95)) * 100 - 100)},
+    }
+
+
+@profiled
+def simulate(r_history, risk_pct, n_paths=10_000, n_trades=100, ruin_pct=50.0, target_pct=100.0, seed=25):
+    """Bootstrap equity paths from past R-multiples, risking risk_pct of equity per trade.
+
+    Ruin is losing ruin_pct of the starting balance; the target is growing it by target_pct.
+    Drawdowns and final equity are in percent. n_paths * n_trades may not exceed MAX_CELLS.
+    """
+    history = tuple(float(r) for r in r_history)
+    if not history:
+        return None
+    if int(n_paths) * int(n_trades) > MAX_CELLS:
+        raise ValueError(f"{int(n_paths):,} paths of {int(n_trades)} trades is over the {MAX_CELLS:,} trade limit")
+    return _simulate(history, float(risk_pct), int(n_paths), int(n_trades), float(ruin_pct), float(target_pct), int(seed))
@@ -0,0 +1,46 @@
+class PortfolioLedger:
+    """Aggregate open risk and exposure across active trades, kept up to date per change.
+
+    Each trade contributes its latest (risk, capital_used); re-sizing replaces its previous
+    contribution, so totals never need to be re-summed.
+    """
+
+    def __init__(self):
+        self.positions = {}
+        self.open_risk = 0.0
+        self.exposure = 0.0
+
+    def set(self, trade_id, risk, capital_used):
+        old_risk, old_capital = self.positions.get(trade_id, (0.0, 0.0))
+        self.open_risk += risk - old_risk
+        self.exposure += capital_used - old_capital
+        self.positions[trade_id] = (risk, capital_used)
+
+    def remove(self, trade_id):
+        risk, capital_used = self.positions.pop(trade_id, (0.0, 0.0))
+        self.open_risk -= risk
+        self.exposure -= capital_used
+        if not self.positions:
+            # Drop accumulated float drift once nothing is open
+            self.open_risk = self.exposure = 0.0
+
+    def projected(self, trade_id, risk, capital_used):
+        """Totals if trade_id were re-sized to (risk, capital_used)."""
+        old_risk, old_capital = self.positions.get(trade_id, (0.0, 0.0))
+        return self.open_risk + risk - old_risk, self.exposure + capital_used - old_capital
+
+    def headroom(self, balance, max_open_risk_pct, max_exposure_pct):
+        max_risk = balance * max_open_risk_pct / 100
+        max_exposure = balance * max_exposure_pct / 100
+        return {
+            "open_risk": self.open_risk,
+            "exposure": self.exposure,
+            "max_open_risk": max_risk,
+            "max_exposure": max_exposure,
+            "risk_headroom": max_risk - self.open_risk,
+            "exposure_headroom": max_exposure - self.exposure,
+        }
+
+    def allows(self, trade_id, risk, capital_used, balance, max_open_risk_pct):
+        projected_risk, _ = self.projected(trade_id, risk, capital_used)
+        return projected_risk <= balance * max_open_risk_pct / 100 + 1e-9
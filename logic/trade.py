@@ -1,7 +1,20 @@
-import os
-import csv
-import tempfile
-from datetime import datetime
+import storage.journal as journal
+import storage.writer as writer
+from storage.records import TradeRecord
+from helpers.profiling import profiled
+
+# numpy is imported inside the sizing functions so importing this module stays cheap
+
+ENTRY_HEADERS = [
+    "ID", "Date", "Time", "Instrument",
+    "Actual Entry", "Actual Stop", "Target TP",
+    "Capital Allocation (%)", "Position Size",
+    "Used", "Risk", "Balance", "Max RPT (%)", "Actual RPT (%)", "Divergence (%)", "R-Multiple"
+]
+EXIT_HEADERS = [
+    "Exit Price", "Exit Time", "Exit Reason", "Result", "P/L", "Final R-Multiple",
+    "What Went Well", "What to Improve", "Closing Notes"
+]
 
 
 def frange(start, stop, step):
@@ -14,19 +27,62 @@ def infer_direction(entry, stop):
     return "Long" if stop < entry else "Short"
 
 
+def round_exact(values, ndigits=2):
+    """np.round that matches Python's round() exactly, including near-half cases."""
+    import numpy as np
+    values = np.asarray(values, dtype=float)
+    rounded = np.array(np.round(values, ndigits))
+    # np.round scales before rounding, which can flip values sitting on a half; redo those exactly
+    with np.errstate(invalid="ignore"):
+        scaled = values * 10 ** ndigits
+        near_half = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    if near_half.any():
+        rounded[near_half] = [round(float(v), ndigits) for v in values[near_half]]
+    return rounded
+
+
+@profiled
 def calculate_trade_details(entry, stop, contribution_pct, balance, target_tp=None, monetary_risk=None):
-    direction = infer_direction(entry, stop)
-    sl_distance = abs(entry - stop)
-    contribution_pct = float(contribution_pct)
-    capital_allocation = round(balance * (contribution_pct / 100), 2)
+    import numpy as np
+    details = calculate_trade_details_batch(
+        [entry], [stop], [contribution_pct], balance,
+        target_tps=None if target_tp is None else [target_tp]
+    )
+    r_multiple = float(details["r_multiple"][0])
 
-    position_size = round(capital_allocation / entry, 2) if entry != 0 else 0
-    capital_used = round(position_size * entry, 2)
-    risk = round(sl_distance * position_size, 2)
+    return {
+        "direction": str(details["direction"][0]),
+        "sl_distance": float(details["sl_distance"][0]),
+        "position_size": float(details["position_size"][0]),
+        "capital_used": float(details["capital_used"][0]),
+        "risk": float(details["risk"][0]),
+        "r_multiple": None if np.isnan(r_multiple) else r_multiple
+    }
 
-    r_multiple = None
-    if target_tp is not None and sl_distance > 0:
-        r_multiple = round(abs(target_tp - entry) / sl_distance, 2)
+
+def calculate_trade_details_batch(entries, stops, contribution_pcts, balance, target_tps=None):
+    """Size many setups in one vectorised pass; r_multiple is NaN where it is undefined."""
+    import numpy as np
+    entries = np.asarray(entries, dtype=float)
+    stops = np.asarray(stops, dtype=float)
+    contribution_pcts = np.asarray(contribution_pcts, dtype=float)
+    balance = np.asarray(balance, dtype=float)
+
+    direction = np.where(stops < entries, "Long", "Short")
+    sl_distance = np.abs(entries - stops)
+    capital_allocation = round_exact(balance * (contribution_pcts / 100))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        position_size = np.where(entries != 0, round_exact(capital_allocation / entries), 0.0)
+    capital_used = round_exact(position_size * entries)
+    risk = round_exact(sl_distance * position_size)
+
+    r_multiple = np.full(np.broadcast(entries, stops).shape, np.nan)
+    if target_tps is not None:
+        target_tps = np.asarray(target_tps, dtype=float)
+        valid = ~np.isnan(target_tps) & (sl_distance > 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r_multiple = np.where(valid, round_exact(np.abs(target_tps - entries) / sl_distance), np.nan)
 
     return {
         "direction": direction,
@@ -38,26 +94,21 @@ def calculate_trade_details(entry, stop, contribution_pct, balance, target_tp=No
     }
 
 
-def log_trade_entry(trade_data, balance=10000, max_rpt=1.0):
-    file_path = "data/trades.csv"
-    headers = [
-        "ID", "Date", "Time", "Instrument",
-        "Actual Entry", "Actual Stop", "Target TP",
-        "Capital Allocation (%)", "Position Size",
-        "Used", "Risk", "Balance", "Max RPT (%)", "Actual RPT (%)", "Divergence (%)", "R-Multiple"
-    ]
-
-    # Generate unique trade ID
-    date_str = datetime.now().strftime("%d%m%Y")
-    time_str = trade_data["entry_time"].replace(":", "")
-    trade_count = 1
+def size_setups(setups, balance):
+    """Size a DataFrame of setups with entry, stop, contribution_pct and optional target_tp columns."""
+    details = calculate_trade_details_batch(
+        setups["entry"].to_numpy(dtype=float),
+        setups["stop"].to_numpy(dtype=float),
+        setups["contribution_pct"].to_numpy(dtype=float),
+        balance,
+        target_tps=setups["target_tp"].to_numpy(dtype=float) if "target_tp" in setups else None
+    )
+    return setups.assign(**details)
 
-    if os.path.exists(file_path):
-        with open(file_path, "r", newline="", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            trade_count = sum(1 for row in reader if row.get("Date") == trade_data["entry_date"]) + 1
 
-    trade_id = f"{date_str}-{time_str}-{trade_count:05d}"
+@profiled
+def log_trade_entry(trade_data, balance=10000, max_rpt=1.0, db_path=journal.JOURNAL_DB):
+    trade_id = journal.allocate_trade_id(trade_data["entry_time"], db_path=db_path)
 
     # Calculate metrics
     calc = calculate_trade_details(
@@ -71,66 +122,64 @@ def log_trade_entry(trade_data, balance=10000, max_rpt=1.0):
     actual_rpt_pct = (calc["risk"] / balance) * 100
     divergence_pct = (actual_rpt_pct / max_rpt * 100) if max_rpt > 0 else 0
 
-    row = [
-        trade_id,
-        trade_data["entry_date"],
-        trade_data["entry_time"],
-        trade_data.get("instrument", "PLACEHOLDER"),
-        trade_data["actual_entry"],
-        trade_data["actual_stop"],
-        trade_data["target_tp"],
-        trade_data["contribution_pct"],
-        calc["position_size"],
-        calc["capital_used"],
-        calc["risk"],
-        balance,
-        round(max_rpt, 2),
-        round(actual_rpt_pct, 2),
-        round(divergence_pct, 2),
-        calc["r_multiple"]
-    ]
-
-    write_headers = not os.path.exists(file_path) or os.stat(file_path).st_size == 0
+    record = TradeRecord(
+        trade_id=trade_id,
+        date=trade_data["entry_date"],
+        time=trade_data["entry_time"],
+        instrument=trade_data.get("instrument", "PLACEHOLDER"),
+        actual_entry=trade_data["actual_entry"],
+        actual_stop=trade_data["actual_stop"],
+        target_tp=trade_data["target_tp"],
+        capital_allocation_pct=trade_data["contribution_pct"],
+        position_size=calc["position_size"],
+        used=calc["capital_used"],
+        risk=calc["risk"],
+        balance=balance,
+        max_rpt_pct=round(max_rpt, 2),
+        actual_rpt_pct=round(actual_rpt_pct, 2),
+        divergence_pct=round(divergence_pct, 2),
+        r_multiple=calc["r_multiple"]
+    )
 
-    with open(file_path, "a", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        if write_headers:
-            writer.writerow(headers)
-        writer.writerow(row)
+    writer.append_trade(record.to_row(ENTRY_HEADERS), db_path=db_path)
 
     return trade_id
 
 
-def update_trade_row(trade_id: str, updates: dict, file_path="data/trades.csv"):
+@profiled
+def update_trade_row(trade_id: str, updates: dict, db_path=journal.JOURNAL_DB):
     """Update existing trade row identified by trade_id with new fields."""
-    if not os.path.exists(file_path):
-        raise FileNotFoundError(f"{file_path} does not exist")
-
-    updated = False
-    temp_fd, temp_path = tempfile.mkstemp()
-    os.close(temp_fd)
-
-    with open(file_path, "r", newline="", encoding="utf-8", errors="replace") as infile, \
-         open(temp_path, "w", newline="", encoding="utf-8") as outfile:
-
-        reader = csv.DictReader(infile)
-        fieldnames = reader.fieldnames or []
-
-        # Ensure all update keys are in the header
-        for k in updates.keys():
-            if k not in fieldnames:
-                fieldnames.append(k)
-
-        writer = csv.DictWriter(outfile, fieldnames=fieldnames)
-        writer.writeheader()
-
-        for row in reader:
-            if row.get("ID") == trade_id:
-                row.update(updates)
-                updated = True
-            writer.writerow(row)
-
-    os.replace(temp_path, file_path)
-
-    if not updated:
-        raise ValueError(f"Trade ID {trade_id} not found in {file_path}")
+    writer.update_trade(trade_id, updates, db_path=db_path)
+
+
+@profiled
+def finalise_trade(trade_id: str, exit_price, exit_time="", exit_reason="", result=None, reflections=None,
+                   db_path=journal.JOURNAL_DB):
+    """Record the exit of a logged trade; returns (result, P/L).
+
+    P/L is signed by direction and Final R-Multiple is |P/L| over the logged risk. result defaults
+    to the one the P/L sign implies; reflections maps columns such as Closing Notes to their text.
+    """
+    row = journal.get_trade(trade_id, db_path=db_path)
+    if row is None:
+        raise ValueError(f"Trade ID {trade_id} not found in journal")
+
+    entry = float(row["Actual Entry"])
+    stop = float(row["Actual Stop"])
+    position_size = float(row["Position Size"])
+    risk = float(row.get("Risk") or 0)
+
+    sign = 1 if infer_direction(entry, stop) == "Long" else -1
+    pnl = round((float(exit_price) - entry) * position_size * sign, 2)
+    result = result or ("Profit" if pnl > 0 else "Loss" if pnl < 0 else "Break-even")
+
+    update_trade_row(trade_id, {
+        "Exit Price": exit_price,
+        "Exit Time": exit_time,
+        "Exit Reason": exit_reason,
+        "Result": result,
+        "P/L": pnl,
+        "Final R-Multiple": round(abs(pnl / risk), 2) if risk else 0,
+        **(reflections or {}),
+    }, db_path=db_path)
+    return result, pnl
@@ -0,0 +1,76 @@
+import math
+
+import storage.journal as journal
+
+NUMERIC_COLUMNS = [
+    "Actual Entry", "Actual Stop", "Target TP", "Capital Allocation (%)", "Position Size",
+    "Used", "Risk", "Balance", "Exit Price", "P/L", "Final R-Multiple"
+]
+RESULTS = {"Profit", "Loss", "Break-even"}
+# Stored amounts are rounded to pennies and imported prices to 4 decimals
+TOLERANCE = 0.011
+RELATIVE_TOLERANCE = 1e-4
+
+
+def _number(value):
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def validate_journal(db_path=journal.JOURNAL_DB):
+    """Check every journal row and return (row number, trade ID, problem) tuples."""
+    import numpy as np
+    rows = list(journal.iter_rows(db_path))
+
+    issues = []
+    seen = {}
+    numbers = {c: [] for c in NUMERIC_COLUMNS}
+
+    for n, row in enumerate(rows, start=1):
+        trade_id = row.get("ID") or ""
+        if not trade_id:
+            issues.append((n, trade_id, "missing ID"))
+        elif trade_id in seen:
+            issues.append((n, trade_id, f"duplicate ID (first seen on row {seen[trade_id]})"))
+        else:
+            seen[trade_id] = n
+
+        for c in NUMERIC_COLUMNS:
+            value = _number(row.get(c))
+            if value is not None and math.isnan(value):
+                issues.append((n, trade_id, f"{c} is not a number: {row.get(c)!r}"))
+                value = None
+            numbers[c].append(math.nan if value is None else value)
+
+        result = row.get("Result") or ""
+        if result and result not in RESULTS:
+            issues.append((n, trade_id, f"unknown Result {result!r}"))
+        pnl = numbers["P/L"][-1]
+        if result in RESULTS and not math.isnan(pnl):
+            expected = "Profit" if pnl > 0 else "Loss" if pnl < 0 else "Break-even"
+            if result != expected:
+                issues.append((n, trade_id, f"Result is {result} but P/L is {pnl:g}"))
+        if row.get("Exit Price") and not result:
+            issues.append((n, trade_id, "exit price recorded without a Result"))
+
+    if not rows:
+        return issues
+
+    # Risk and capital used must follow from entry, stop and size, whichever way the size was chosen
+    arrays = {c: np.array(v) for c, v in numbers.items()}
+    entry, stop, size = arrays["Actual Entry"], arrays["Actual Stop"], arrays["Position Size"]
+    expected = {"Used": np.abs(size * entry), "Risk": np.abs(entry - stop) * size}
+    for column, derived in expected.items():
+        stored = arrays[column]
+        with np.errstate(invalid="ignore"):
+            mismatch = np.abs(stored - derived) > TOLERANCE + np.abs(derived) * RELATIVE_TOLERANCE
+        for i in np.flatnonzero(mismatch):
+            issues.append((i + 1, rows[i].get("ID") or "", f"{column} is {stored[i]:g}, entry/stop/size give {derived[i]:.2f}"))
+    for i in np.flatnonzero(entry == stop):
+        issues.append((i + 1, rows[i].get("ID") or "", "stop equals entry"))
+
+    return sorted(issues, key=lambda issue: issue[0])
@@ -0,0 +1,417 @@
+import os
+import csv
+import json
+import glob
+import tempfile
+from contextlib import contextmanager
+from datetime import date, datetime
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+import storage.journal as journal
+from storage.records import TradeRecord, COLUMNS, LEGACY_ALIASES
+
+SIDECAR_DIR = os.path.join(journal.DATA_DIR, 'journal.arrow')
+
+# Repetitive text columns held as dictionary codes in a TradeHistory
+DICTIONARY_COLUMNS = ["Time", "Instrument", "Mood", "Strategy", "Exit Time", "Exit Reason", "Result"]
+
+# Segments are merged into one once there are more than this many
+MAX_SEGMENTS = 16
+CONVERT_BATCH_ROWS = 50_000
+
+STRING_COLUMNS = [
+    "ID", "Time", "Instrument", "Mood", "Strategy", "Notes",
+    "Exit Time", "Exit Reason", "Result", "What Went Well", "What to Improve", "Closing Notes"
+]
+FLOAT_COLUMNS = [
+    "Actual Entry", "Actual Stop", "Target TP", "Capital Allocation (%)", "Position Size",
+    "Used", "Risk", "Balance", "Max RPT (%)", "Actual RPT (%)", "Divergence (%)", "R-Multiple",
+    "Exit Price", "P/L", "Final R-Multiple"
+]
+
+SCHEMA = pa.schema(
+    [pa.field(journal.SEQ_COLUMN, pa.int64()), pa.field(journal.VERSION_COLUMN, pa.int64())]
+    + [pa.field("Date", pa.date32())]
+    + [pa.field(c, pa.string()) for c in STRING_COLUMNS]
+    + [pa.field(c, pa.float64()) for c in FLOAT_COLUMNS]
+)
+
+def _to_float(value):
+    try:
+        return float(value) if value not in (None, "") else None
+    except ValueError:
+        return None
+
+
+def _to_date(value):
+    if not value:
+        return None
+    for fmt in ("%Y-%m-%d", "%d%m%Y", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _to_record_batch(rows):
+    """Build a typed batch from dict rows keyed by journal column names."""
+    arrays = []
+    for field in SCHEMA:
+        values = [row.get(field.name) for row in rows]
+        if field.type == pa.float64():
+            values = [_to_float(v) for v in values]
+        elif field.type == pa.date32():
+            values = [v if isinstance(v, date) else _to_date(v) for v in values]
+        elif field.type == pa.string():
+            values = [None if v is None else str(v) for v in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=SCHEMA)
+
+
+def _segment_number(path):
+    return int(os.path.basename(path)[len("part-"):-len(".arrow")])
+
+
+def _segments(sidecar_dir, superseded=False):
+    # Segments numbered below first_segment were merged by compact and are no longer read
+    first = _load_state(sidecar_dir).get("first_segment", 1)
+    paths = sorted(glob.glob(os.path.join(sidecar_dir, "part-*.arrow")))
+    return [p for p in paths if (_segment_number(p) < first) == superseded]
+
+
+def _remove_superseded(sidecar_dir):
+    # Windows refuses to delete a segment a loaded table still has memory-mapped; it is retried on a later sync
+    for path in _segments(sidecar_dir, superseded=True):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _temp_path(path):
+    # A unique temp file next to path, so os.replace never crosses filesystems or races another writer
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    return temp_path
+
+
+def _write_table(path, table):
+    temp_path = _temp_path(path)
+    try:
+        with pa.OSFile(temp_path, "wb") as sink, pa.ipc.new_file(sink, SCHEMA) as writer:
+            writer.write_table(table)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def _state_path(sidecar_dir):
+    return os.path.join(sidecar_dir, "state.json")
+
+
+def _load_state(sidecar_dir):
+    path = _state_path(sidecar_dir)
+    if not os.path.exists(path):
+        return {"version": 0, "next_segment": 1}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_state(sidecar_dir, state):
+    temp_path = _temp_path(_state_path(sidecar_dir))
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(temp_path, _state_path(sidecar_dir))
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+@contextmanager
+def _locked(db_path):
+    # Reading the state, writing a segment and committing the state must not interleave with another
+    # session's. The journal's write lock serialises them across threads and processes; journal
+    # writes wait the few milliseconds this takes.
+    with journal.open_journal(db_path, write=True):
+        yield
+
+
+def _sync(db_path, sidecar_dir):
+    """sync() for a caller holding the lock; returns (rows written, state after)."""
+    os.makedirs(sidecar_dir, exist_ok=True)
+    _remove_superseded(sidecar_dir)
+    state = _load_state(sidecar_dir)
+
+    rows = journal.changed_rows(state["version"], SCHEMA.names, db_path=db_path)
+    if not rows:
+        return 0, state
+
+    table = pa.Table.from_batches([_to_record_batch(rows)])
+    _write_table(os.path.join(sidecar_dir, f"part-{state['next_segment']:06d}.arrow"), table)
+    state = {**state, "version": rows[-1][journal.VERSION_COLUMN], "next_segment": state["next_segment"] + 1}
+    _save_state(sidecar_dir, state)
+
+    if len(_segments(sidecar_dir)) > MAX_SEGMENTS:
+        state = _compact(sidecar_dir)
+    return len(rows), state
+
+
+def sync(db_path=journal.JOURNAL_DB, sidecar_dir=SIDECAR_DIR):
+    """Append rows changed since the last sync as a new segment; returns the number of rows written."""
+    with _locked(db_path):
+        return _sync(db_path, sidecar_dir)[0]
+
+
+def synced_version(db_path=journal.JOURNAL_DB, sidecar_dir=SIDECAR_DIR):
+    """Sync the sidecar and return the journal version it now reflects, for cache keys."""
+    with _locked(db_path):
+        return _sync(db_path, sidecar_dir)[1]["version"]
+
+
+def _read_segments(paths, columns):
+    tables = []
+    for path in paths:
+        # Memory-mapped: only the requested column buffers are paged in
+        with pa.memory_map(path, "r") as source:
+            tables.append(pa.ipc.open_file(source).read_all().select(columns))
+    return pa.concat_tables(tables) if tables else SCHEMA.empty_table().select(columns)
+
+
+def _latest_rows(table):
+    # Later segments hold newer versions of a row; keep only the highest version per _seq
+    table = table.append_column("_order", pa.array(range(table.num_rows), type=pa.int64()))
+    table = table.sort_by([(journal.SEQ_COLUMN, "ascending"), (journal.VERSION_COLUMN, "ascending")])
+    latest = table.group_by(journal.SEQ_COLUMN, use_threads=False).aggregate([("_order", "last")])
+    keep = pc.is_in(table["_order"], value_set=latest["_order_last"])
+    return table.filter(keep).drop_columns(["_order"])
+
+
+def load_columns(columns=None, db_path=journal.JOURNAL_DB, sidecar_dir=SIDECAR_DIR):
+    """Load the journal as a typed Arrow table, reading only the requested columns."""
+    columns = list(columns) if columns else [f.name for f in SCHEMA if not f.name.startswith("_")]
+    with _locked(db_path):
+        _sync(db_path, sidecar_dir)
+        # Mapped under the lock: once open, a compaction in another session can't remove them from under us
+        table = _read_segments(_segments(sidecar_dir), [journal.SEQ_COLUMN, journal.VERSION_COLUMN] + columns)
+    return _latest_rows(table).select(columns)
+
+
+def compact(db_path=journal.JOURNAL_DB, sidecar_dir=SIDECAR_DIR):
+    """Merge all segments into a new one, dropping superseded row versions.
+
+    The old segments may still be mapped by tables loaded earlier, so they are only retired here
+    and deleted once that is possible.
+    """
+    with _locked(db_path):
+        _compact(sidecar_dir)
+
+
+def _compact(sidecar_dir):
+    paths = _segments(sidecar_dir)
+    state = _load_state(sidecar_dir)
+    if len(paths) <= 1:
+        return state
+
+    table = _latest_rows(_read_segments(paths, SCHEMA.names)).sort_by(journal.SEQ_COLUMN)
+    merged = os.path.join(sidecar_dir, f"part-{state['next_segment']:06d}.arrow")
+    _write_table(merged, table)
+    # Release this function's own references into the mapped segments before deleting them
+    del table
+    state = {**state, "next_segment": state["next_segment"] + 1, "first_segment": state["next_segment"]}
+    _save_state(sidecar_dir, state)
+    _remove_superseded(sidecar_dir)
+    return state
+
+
+_NUMBER = r"^\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?\s*$"
+_DATE_FORMATS = ("%Y-%m-%d", "%d%m%Y", "%d/%m/%Y")
+
+
+def _typed_batch(text, first_seq):
+    """Convert an all-text batch (journal column names) to SCHEMA, the way _to_record_batch does."""
+    arrays = []
+    for field in SCHEMA:
+        if field.name == journal.SEQ_COLUMN:
+            arrays.append(pa.array(range(first_seq, first_seq + text.num_rows), type=pa.int64()))
+        elif field.name == journal.VERSION_COLUMN:
+            arrays.append(pa.nulls(text.num_rows, pa.int64()).fill_null(0))
+        elif field.name not in text.column_names:
+            arrays.append(pa.nulls(text.num_rows, field.type))
+        elif field.type == pa.float64():
+            values = text.column(field.name)
+            numeric = pc.match_substring_regex(values, _NUMBER)
+            arrays.append(pc.if_else(numeric, pc.utf8_trim_whitespace(values), None).cast(pa.float64()))
+        elif field.type == pa.date32():
+            values = text.column(field.name)
+            parsed = [pc.strptime(values, format=f, unit="s", error_is_null=True) for f in _DATE_FORMATS]
+            arrays.append(pc.coalesce(*parsed).cast(pa.date32()))
+        else:
+            arrays.append(text.column(field.name))
+    return pa.RecordBatch.from_arrays(arrays, schema=SCHEMA)
+
+
+def _ragged_batch(rows, names, schema):
+    """Text batch for rows pyarrow rejected, padded or cut to the header like csv.DictReader."""
+    values = []
+    for row in rows:
+        fields = next(csv.reader([row.text]), [])
+        values.append(dict(zip(names, fields + [None] * (len(names) - len(fields)))))
+    return pa.RecordBatch.from_pylist(values, schema=schema)
+
+
+def _csv_batches(csv_path):
+    """Typed record batches from a trades.csv in any of the historical layouts."""
+    import heapq
+
+    with open(csv_path, "r", newline="", encoding="utf-8", errors="replace") as f:
+        header = next(csv.reader(f), None)
+    if not header:
+        return
+
+    # Legacy journals are ragged: rows appended before the header was widened are short.
+    # pyarrow hands those rows to the handler; they are spliced back in by record number.
+    rejected = []
+
+    def keep_ragged(row):
+        heapq.heappush(rejected, (row.number, len(rejected), row))
+        return "skip"
+
+    # Everything is read as text and converted column-wise, so "0930" stays a time
+    names = [LEGACY_ALIASES.get(h, h) for h in header]
+    reader = pacsv.open_csv(
+        csv_path,
+        read_options=pacsv.ReadOptions(skip_rows=1, column_names=names),
+        parse_options=pacsv.ParseOptions(newlines_in_values=True, invalid_row_handler=keep_ragged),
+        convert_options=pacsv.ConvertOptions(
+            column_types={n: pa.string() for n in names}, strings_can_be_null=False,
+            include_columns=[n for n in dict.fromkeys(names) if n in SCHEMA.names]
+        ),
+    )
+
+    count = 0
+    # Record number of the next row to emit; the header is record 1
+    number = 2
+
+    def take_rejected(schema):
+        nonlocal number
+        rows = []
+        while rejected and rejected[0][0] <= number:
+            rows.append(heapq.heappop(rejected)[2])
+            number += 1
+        return [_ragged_batch(rows, names, schema)] if rows else []
+
+    for text in reader:
+        parts, start = [], 0
+        while start < text.num_rows:
+            parts += take_rejected(text.schema)
+            run = text.num_rows - start
+            if rejected:
+                run = max(min(run, rejected[0][0] - number), 1)
+            parts.append(text.slice(start, run))
+            start += run
+            number += run
+        parts += take_rejected(text.schema)
+
+        batches = pa.Table.from_batches(parts, schema=text.schema).combine_chunks().to_batches()
+        if not batches:
+            continue
+        batch = batches[0]
+        yield _typed_batch(batch, count + 1)
+        count += batch.num_rows
+
+    if rejected:
+        schema = pa.schema([(n, pa.string()) for n in dict.fromkeys(names) if n in SCHEMA.names])
+        tail = _ragged_batch([r for _, _, r in sorted(rejected)], names, schema)
+        yield _typed_batch(tail, count + 1)
+
+
+def convert_csv(csv_path=journal.TRADES_CSV, arrow_path=None):
+    """Stream a trades.csv (any of the historical layouts) into a single typed Arrow IPC file."""
+    arrow_path = arrow_path or os.path.splitext(csv_path)[0] + ".arrow"
+    count = 0
+
+    with pa.OSFile(arrow_path, "wb") as sink, pa.ipc.new_file(sink, SCHEMA) as writer:
+        for batch in _csv_batches(csv_path):
+            writer.write_batch(batch)
+            count += batch.num_rows
+
+    return count
+
+
+def _dictionary_encode(table):
+    for name in DICTIONARY_COLUMNS:
+        if name in table.column_names:
+            i = table.column_names.index(name)
+            table = table.set_column(i, name, table.column(i).dictionary_encode())
+    return table
+
+
+class TradeHistory:
+    """Loaded journal history held column-wise in one typed Arrow table.
+
+    Rows only become TradeRecords when accessed; amounts stay in contiguous float64 buffers and
+    repetitive text is dictionary-encoded, so a million trades take a fraction of a list of dicts.
+    """
+
+    def __init__(self, table):
+        self.table = _dictionary_encode(table.select([f.name for f in SCHEMA if not f.name.startswith("_")]))
+
+    @classmethod
+    def from_journal(cls, db_path=journal.JOURNAL_DB, sidecar_dir=SIDECAR_DIR):
+        return cls(load_columns(db_path=db_path, sidecar_dir=sidecar_dir))
+
+    @classmethod
+    def from_csv(cls, csv_path=journal.TRADES_CSV):
+        # Encoded batch by batch so the plain-text table never exists in full
+        batches = [_dictionary_encode(pa.Table.from_batches([b])) for b in _csv_batches(csv_path)]
+        if not batches:
+            return cls(SCHEMA.empty_table())
+        return cls(pa.concat_tables(batches))
+
+    @classmethod
+    def from_records(cls, records):
+        rows = [dict(r.to_row(), **{journal.SEQ_COLUMN: i, journal.VERSION_COLUMN: 0})
+                for i, r in enumerate(records, start=1)]
+        return cls(pa.Table.from_batches([_to_record_batch(rows)]) if rows else SCHEMA.empty_table())
+
+    def __len__(self):
+        return self.table.num_rows
+
+    def __getitem__(self, index):
+        return TradeRecord.from_row(self.table.slice(index, 1).to_pylist()[0])
+
+    def __iter__(self):
+        for batch in self.table.to_batches(CONVERT_BATCH_ROWS):
+            for row in batch.to_pylist():
+                yield TradeRecord.from_row(row)
+
+    @property
+    def nbytes(self):
+        return self.table.nbytes
+
+    def column(self, name):
+        """One column as a NumPy array (float columns without copying when they have no nulls)."""
+        return self.table.column(name).to_numpy()
+
+    def to_csv(self, csv_path):
+        """Write the history in the journal CSV layout; returns the number of rows."""
+        columns = [c for c in COLUMNS.values() if c in self.table.column_names]
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for batch in self.table.select(columns).to_batches(CONVERT_BATCH_ROWS):
+                # Text and dates are cast in Arrow, floats stay floats so csv writes them as Python would
+                values = [
+                    (col if pa.types.is_floating(col.type) else col.cast(pa.string())).to_pylist()
+                    for col in batch.columns
+                ]
+                writer.writerows(zip(*values))
+        return len(self)
@@ -0,0 +1,661 @@
+import os
+import re
+import csv
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from helpers.profiling import add_io
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+TRADES_CSV = os.path.join(DATA_DIR, 'trades.csv')
+JOURNAL_DB = os.path.join(DATA_DIR, 'journal.sqlite3')
+
+# Columns starting with "_" are bookkeeping and never exported to CSV
+SEQ_COLUMN = "_seq"
+# Journal-wide change counter stamped on every inserted/updated row
+VERSION_COLUMN = "_version"
+
+SCHEMA_VERSION = 5
+
+# Low-cardinality columns with a persisted bitmap per value, stored in chunks of BITMAP_CHUNK rows:
+# bit n of chunk c is set for the row with _seq c * BITMAP_CHUNK + n, so a write rewrites one chunk
+BITMAP_COLUMNS = ["Strategy", "Mood"]
+BITMAP_CHUNK = 8_192
+# Columns filtered by range through an ordinary SQLite index
+RANGE_COLUMNS = ["Date"]
+# Free-text labels with too many distinct values for bitmaps, matched through an ordinary SQLite index
+LOOKUP_COLUMNS = ["Instrument"]
+# Matches ranked per notes search; a word found in most notes is ranked within its newest matches only
+RANK_WINDOW = 2_000
+# Free-text columns -> their column in the trade_text full-text index
+TEXT_COLUMNS = {
+    "Notes": "notes",
+    "What Went Well": "went_well",
+    "What to Improve": "to_improve",
+    "Closing Notes": "closing_notes",
+}
+
+# Seconds a connection waits for another session's write lock before giving up
+BUSY_TIMEOUT = 10.0
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _to_text(value):
+    # Store values exactly as csv.writer would so CSV round-trips are lossless
+    return "" if value is None else str(value)
+
+
+def _payload_size(values):
+    return sum(len(v) for v in values if isinstance(v, str))
+
+
+def connect(db_path=JOURNAL_DB):
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    is_new = not os.path.exists(db_path)
+
+    # Autocommit mode: writers open explicit BEGIN IMMEDIATE transactions (see open_journal)
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA synchronous = NORMAL")
+    _migrate(conn)
+
+    # First run: migrate the legacy CSV journal into the store
+    if is_new and os.path.abspath(db_path) == os.path.abspath(JOURNAL_DB) \
+            and os.path.exists(TRADES_CSV) and os.path.getsize(TRADES_CSV) > 0:
+        with _transaction(conn):
+            if conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0] == 0:
+                _import_csv(conn, TRADES_CSV)
+
+    return conn
+
+
+@contextmanager
+def _transaction(conn):
+    # IMMEDIATE takes the write lock up front, so concurrent sessions queue on the
+    # busy timeout instead of failing when a read transaction tries to upgrade
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _migrate(conn):
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        return
+
+    # WAL lets readers carry on while another session writes; cannot be set inside a transaction
+    conn.execute("PRAGMA journal_mode = WAL")
+
+    with _transaction(conn):
+        # Re-read under the write lock in case another session migrated first
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+
+        conn.execute(f'CREATE TABLE IF NOT EXISTS trades ({SEQ_COLUMN} INTEGER PRIMARY KEY, "ID" TEXT)')
+        # Not UNIQUE: legacy journals can contain duplicate IDs and must import as-is
+        conn.execute('CREATE INDEX IF NOT EXISTS trades_id ON trades("ID")')
+        conn.execute("CREATE TABLE IF NOT EXISTS id_sequence (day TEXT PRIMARY KEY, counter INTEGER NOT NULL)")
+
+        if version < 1:
+            if VERSION_COLUMN not in _table_columns(conn):
+                conn.execute(f"ALTER TABLE trades ADD COLUMN {VERSION_COLUMN} INTEGER NOT NULL DEFAULT 0")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS trades_version ON trades({VERSION_COLUMN})")
+            conn.execute("CREATE TABLE IF NOT EXISTS journal_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO journal_meta (key, value) VALUES ('version', 0)")
+
+        if version < 3:
+            for name in _table_columns(conn):
+                _create_column_index(conn, name)
+
+        if version < 4:
+            # Porter stemming; rowid is the trade's _seq
+            conn.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS trade_text USING fts5("ID" UNINDEXED, '
+                f'{", ".join(TEXT_COLUMNS.values())}, tokenize = "porter unicode61")'
+            )
+            _index_text(conn, "1")
+
+        if version < 5:
+            # v3/v4 kept one bitmap blob per value, rewritten whole on every write, and one for each Instrument
+            conn.execute("DROP TABLE IF EXISTS trade_bitmaps")
+            conn.execute(
+                "CREATE TABLE trade_bitmaps (field TEXT NOT NULL, value TEXT NOT NULL, chunk INTEGER NOT NULL, "
+                "bits BLOB NOT NULL, PRIMARY KEY (field, value, chunk)) WITHOUT ROWID"
+            )
+            for name in _table_columns(conn):
+                _create_column_index(conn, name)
+            _index_rows(conn)
+
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def _next_version(conn):
+    conn.execute("UPDATE journal_meta SET value = value + 1 WHERE key = 'version'")
+    return conn.execute("SELECT value FROM journal_meta WHERE key = 'version'").fetchone()[0]
+
+
+@contextmanager
+def open_journal(db_path=JOURNAL_DB, write=False):
+    conn = connect(db_path)
+    try:
+        if write:
+            with _transaction(conn):
+                yield conn
+        else:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _table_columns(conn):
+    return [row[1] for row in conn.execute("PRAGMA table_info(trades)")]
+
+
+def columns(conn):
+    """Public (CSV) columns of the journal in their original order."""
+    return [c for c in _table_columns(conn) if not c.startswith("_")]
+
+
+def _ensure_columns(conn, names):
+    # SQLite column names are case-insensitive
+    existing = {c.lower() for c in _table_columns(conn)}
+    for name in names:
+        if name.lower() not in existing:
+            # ADD COLUMN only touches the schema, existing rows are not rewritten
+            conn.execute(f"ALTER TABLE trades ADD COLUMN {_quote(name)} TEXT")
+            existing.add(name.lower())
+            _create_column_index(conn, name)
+
+
+def _create_column_index(conn, name):
+    if name.lower() in {c.lower() for c in RANGE_COLUMNS + LOOKUP_COLUMNS}:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {_quote('trades_' + name.lower())} ON trades({_quote(name)})")
+
+
+def _bitmap_fields(names):
+    # Column name as given -> bitmap field it feeds, matched case-insensitively like SQLite does
+    lookup = {c.lower(): c for c in BITMAP_COLUMNS}
+    return {name: lookup[name.lower()] for name in names if name.lower() in lookup}
+
+
+def _load_bits(conn, field, value, chunk):
+    row = conn.execute(
+        "SELECT bits FROM trade_bitmaps WHERE field = ? AND value = ? AND chunk = ?", (field, value, chunk)
+    ).fetchone()
+    return row[0] if row else b""
+
+
+def _set_bits(conn, field, value, seqs, on=True):
+    """Set (or clear) the bits for seqs in the bitmap of field = value, one chunk at a time."""
+    import numpy as np
+
+    # Blank labels are not indexed
+    if value in (None, "") or not len(seqs):
+        return
+    seqs = np.unique(np.asarray(seqs, dtype=np.int64))
+    chunks = seqs // BITMAP_CHUNK
+    for part in np.split(seqs, np.flatnonzero(np.diff(chunks)) + 1):
+        chunk = int(part[0] // BITMAP_CHUNK)
+        bits = np.frombuffer(_load_bits(conn, field, value, chunk), dtype=np.uint8)
+        flags = np.zeros(BITMAP_CHUNK, dtype=np.uint8)
+        flags[:bits.size * 8] = np.unpackbits(bits, bitorder="little")
+        flags[part % BITMAP_CHUNK] = on
+        if flags.any():
+            conn.execute(
+                "INSERT OR REPLACE INTO trade_bitmaps (field, value, chunk, bits) VALUES (?, ?, ?, ?)",
+                (field, value, chunk, np.packbits(flags, bitorder="little").tobytes())
+            )
+        else:
+            # Empty chunks are dropped, so a value is listed only while some row still has it
+            conn.execute(
+                "DELETE FROM trade_bitmaps WHERE field = ? AND value = ? AND chunk = ?", (field, value, chunk)
+            )
+
+
+def _index_rows(conn, after_seq=0):
+    """Add rows past after_seq to the bitmaps; used after bulk inserts and by the v3 migration."""
+    for column, field in _bitmap_fields(_table_columns(conn)).items():
+        by_value = {}
+        for seq, value in conn.execute(
+            f"SELECT {SEQ_COLUMN}, {_quote(column)} FROM trades WHERE {SEQ_COLUMN} > ?", (after_seq,)
+        ):
+            by_value.setdefault(value, []).append(seq)
+        for value, seqs in by_value.items():
+            _set_bits(conn, field, value, seqs)
+
+
+def _index_text(conn, where, params=()):
+    """Re-index the free text of the rows matching where; rows with no text are left out."""
+    present = {c.lower(): c for c in _table_columns(conn)}
+    sources = {present[c.lower()]: target for c, target in TEXT_COLUMNS.items() if c.lower() in present}
+    conn.execute(f"DELETE FROM trade_text WHERE rowid IN (SELECT {SEQ_COLUMN} FROM trades WHERE {where})", params)
+    if not sources:
+        return
+
+    values = [f"COALESCE({_quote(c)}, '')" for c in sources]
+    has_text = " OR ".join(f"{v} <> ''" for v in values)
+    conn.execute(
+        f'INSERT INTO trade_text (rowid, "ID", {", ".join(sources.values())}) '
+        f'SELECT {SEQ_COLUMN}, "ID", {", ".join(values)} FROM trades WHERE ({where}) AND ({has_text})',
+        params
+    )
+
+
+def _has_text(names):
+    text = {c.lower() for c in TEXT_COLUMNS}
+    return any(name.lower() in text for name in names)
+
+
+def _max_seq(conn):
+    return conn.execute(f"SELECT COALESCE(MAX({SEQ_COLUMN}), 0) FROM trades").fetchone()[0]
+
+
+def _insert_rows(conn, fieldnames, rows):
+    placeholders = ", ".join("?" for _ in fieldnames)
+    sql = f"INSERT INTO trades ({', '.join(_quote(f) for f in fieldnames)}) VALUES ({placeholders})"
+    return conn.executemany(sql, rows)
+
+
+def write_append(conn, row: dict):
+    """Append a trade row inside the caller's write transaction; returns the bytes written."""
+    if not row.get("ID"):
+        raise ValueError("Trade row must have an ID")
+
+    _ensure_columns(conn, row.keys())
+    values = [_to_text(v) for v in row.values()]
+    _insert_rows(conn, list(row.keys()) + [VERSION_COLUMN], [values + [_next_version(conn)]])
+
+    seq = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+    for column, field in _bitmap_fields(row.keys()).items():
+        _set_bits(conn, field, _to_text(row[column]), [seq])
+    if _has_text(row.keys()):
+        _index_text(conn, f"{SEQ_COLUMN} = ?", (seq,))
+    return _payload_size(values)
+
+
+def write_update(conn, trade_id: str, updates: dict):
+    """Update the row(s) with the given ID via the ID index; returns the bytes written."""
+    _ensure_columns(conn, updates.keys())
+
+    # Old labels of the rows being updated, so their bits can move to the new value
+    indexed = _bitmap_fields(updates.keys())
+    before = conn.execute(
+        f'SELECT {", ".join([SEQ_COLUMN] + [_quote(c) for c in indexed])} FROM trades WHERE "ID" = ?', (trade_id,)
+    ).fetchall() if indexed else []
+
+    assignments = ", ".join(f"{_quote(k)} = ?" for k in updates.keys())
+    values = [_to_text(v) for v in updates.values()]
+    cur = conn.execute(
+        f'UPDATE trades SET {assignments}, {VERSION_COLUMN} = ? WHERE "ID" = ?',
+        values + [_next_version(conn), trade_id]
+    )
+    if cur.rowcount == 0:
+        raise ValueError(f"Trade ID {trade_id} not found in journal")
+
+    for i, (column, field) in enumerate(indexed.items(), start=1):
+        new = _to_text(updates[column])
+        moved = {}
+        for row in before:
+            if row[i] != new:
+                moved.setdefault(row[i], []).append(row[0])
+        for old, seqs in moved.items():
+            _set_bits(conn, field, old, seqs, on=False)
+        _set_bits(conn, field, new, [seq for seqs in moved.values() for seq in seqs])
+    if _has_text(updates.keys()):
+        _index_text(conn, '"ID" = ?', (trade_id,))
+    return _payload_size(values) * cur.rowcount
+
+
+def write_rows(conn, fieldnames, rows):
+    """Bulk-insert rows (value lists in fieldnames order) under one change version."""
+    _ensure_columns(conn, fieldnames)
+    after_seq = _max_seq(conn)
+    version = _next_version(conn)
+    rows = ([_to_text(v) for v in row] + [version] for row in rows)
+    count = _insert_rows(conn, list(fieldnames) + [VERSION_COLUMN], rows).rowcount
+    _index_rows(conn, after_seq)
+    if _has_text(fieldnames):
+        _index_text(conn, f"{SEQ_COLUMN} > ?", (after_seq,))
+    return count
+
+
+def existing_ids(conn, trade_ids):
+    """The subset of trade_ids already in the journal, looked up through the ID index."""
+    found = set()
+    trade_ids = list(trade_ids)
+    # Stay well under SQLite's bound-parameter limit
+    for i in range(0, len(trade_ids), 500):
+        chunk = trade_ids[i:i + 500]
+        found.update(r[0] for r in conn.execute(
+            f'SELECT "ID" FROM trades WHERE "ID" IN ({", ".join("?" for _ in chunk)})', chunk
+        ))
+    return found
+
+
+def append_trade(row: dict, db_path=JOURNAL_DB):
+    """Append a single trade row, adding any columns the journal does not have yet."""
+    with open_journal(db_path, write=True) as conn:
+        written = write_append(conn, row)
+    add_io(written=written)
+
+
+def update_trade(trade_id: str, updates: dict, db_path=JOURNAL_DB):
+    """Update the row(s) with the given ID in place via the ID index."""
+    with open_journal(db_path, write=True) as conn:
+        written = write_update(conn, trade_id, updates)
+    add_io(written=written)
+
+
+def get_trade(trade_id: str, db_path=JOURNAL_DB):
+    with open_journal(db_path) as conn:
+        cols = columns(conn)
+        row = conn.execute(
+            f'SELECT {", ".join(_quote(c) for c in cols)} FROM trades WHERE "ID" = ? ORDER BY {SEQ_COLUMN} DESC LIMIT 1',
+            (trade_id,)
+        ).fetchone()
+    return dict(zip(cols, row)) if row else None
+
+
+def get_trades(trade_ids, db_path=JOURNAL_DB):
+    """Latest row for each of trade_ids, in the order given; unknown IDs are skipped."""
+    trade_ids = list(trade_ids)
+    found = {}
+    with open_journal(db_path) as conn:
+        cols = columns(conn)
+        # Stay well under SQLite's bound-parameter limit
+        for i in range(0, len(trade_ids), 500):
+            chunk = trade_ids[i:i + 500]
+            cur = conn.execute(
+                f'SELECT {", ".join(_quote(c) for c in cols)} FROM trades '
+                f'WHERE "ID" IN ({", ".join("?" for _ in chunk)}) ORDER BY {SEQ_COLUMN}', chunk
+            )
+            # Later rows win, as in get_trade
+            found.update((row[cols.index("ID")], dict(zip(cols, row))) for row in cur)
+    rows = [found[i] for i in trade_ids if i in found]
+    add_io(read=sum(_payload_size(r.values()) for r in rows))
+    return rows
+
+
+def iter_rows(db_path=JOURNAL_DB):
+    """Every journal row as a dict of its public columns, in insertion order."""
+    with open_journal(db_path) as conn:
+        cols = columns(conn)
+        for row in conn.execute(f"SELECT {', '.join(_quote(c) for c in cols)} FROM trades ORDER BY {SEQ_COLUMN}"):
+            yield dict(zip(cols, row))
+
+
+def changed_rows(since_version, wanted=None, db_path=JOURNAL_DB):
+    """Rows inserted or updated after since_version, oldest change first, with _seq and _version."""
+    with open_journal(db_path) as conn:
+        available = columns(conn)
+        selected = [SEQ_COLUMN, VERSION_COLUMN] + [c for c in (wanted or available) if c in available]
+        cur = conn.execute(
+            f"SELECT {', '.join(_quote(c) for c in selected)} FROM trades "
+            f"WHERE {VERSION_COLUMN} > ? ORDER BY {VERSION_COLUMN}",
+            (since_version,)
+        )
+        rows = [dict(zip(selected, r)) for r in cur]
+    add_io(read=sum(_payload_size(r.values()) for r in rows))
+    return rows
+
+
+def indexed_values(field, db_path=JOURNAL_DB):
+    """Distinct non-blank values of a bitmap- or lookup-indexed column, read from its index alone."""
+    with open_journal(db_path) as conn:
+        if field.lower() not in {c.lower() for c in LOOKUP_COLUMNS}:
+            return [r[0] for r in conn.execute(
+                "SELECT DISTINCT value FROM trade_bitmaps WHERE field = ? ORDER BY value", (field,)
+            )]
+
+        column = _find_column(conn, field)
+        values = []
+        # One index seek per distinct value instead of a scan of every row
+        while column is not None:
+            row = conn.execute(f"SELECT MIN({_quote(column)}) FROM trades WHERE {_quote(column)} > ?",
+                               (values[-1] if values else "",)).fetchone()
+            if row[0] is None:
+                break
+            values.append(row[0])
+        return values
+
+
+def query_trade_ids(strategy=None, mood=None, instrument=None, date_from=None, date_to=None, db_path=JOURNAL_DB):
+    """IDs of the trades matching every given filter, in journal order.
+
+    strategy and mood take one value or a list of values (any of them matches) and are answered from
+    the bitmap indexes; instrument takes the same and uses the Instrument index; date_from/date_to
+    (inclusive, YYYY-MM-DD) use the Date index.
+    """
+    import numpy as np
+
+    filters = {"Strategy": strategy, "Mood": mood}
+    read = 0
+    with open_journal(db_path) as conn:
+        # AND across columns of the OR across each column's values
+        chunk_count = _max_seq(conn) // BITMAP_CHUNK + 1
+        mask = None
+        for field, wanted in filters.items():
+            if wanted is None:
+                continue
+            wanted = [wanted] if isinstance(wanted, str) else list(wanted)
+            union = np.zeros((chunk_count, BITMAP_CHUNK // 8), dtype=np.uint8)
+            for value in wanted:
+                rows = conn.execute(
+                    "SELECT chunk, bits FROM trade_bitmaps WHERE field = ? AND value = ?", (field, str(value))
+                ).fetchall()
+                if rows:
+                    chunks, blobs = zip(*rows)
+                    bits = np.frombuffer(b"".join(blobs), dtype=np.uint8)
+                    union[list(chunks)] |= bits.reshape(len(blobs), -1)
+                    read += bits.size
+            mask = union.ravel() if mask is None else mask & union.ravel()
+
+        seqs = None if mask is None else np.flatnonzero(np.unpackbits(mask, bitorder="little"))
+        if instrument is not None:
+            wanted = [instrument] if isinstance(instrument, str) else list(instrument)
+            # Blank labels never match, as with the bitmaps
+            matched = _lookup_seqs(conn, "Instrument", [str(v) for v in wanted if str(v)])
+            seqs = matched if seqs is None else np.intersect1d(seqs, matched, assume_unique=True)
+        if date_from is not None or date_to is not None:
+            in_range = _date_range_seqs(conn, date_from, date_to)
+            seqs = in_range if seqs is None else np.intersect1d(seqs, in_range, assume_unique=True)
+
+        ids = _ids_by_seq(conn, db_path)
+        matched = ids[seqs] if seqs is not None else ids[1:]
+    add_io(read=read)
+    # Rows without an ID (the cache holds None there) never match; duplicated IDs are listed once
+    return list(dict.fromkeys(i for i in matched.tolist() if i))
+
+
+def _match_expression(text):
+    # Every word must appear (stemmed, so "tired" also finds "tiring"). Words are quoted, so
+    # FTS5 operators and punctuation typed in the box are taken literally.
+    words = re.findall(r"\w+", text)
+    return " ".join(f'"{w}"' for w in words) or None
+
+
+def search_notes(text, limit=50, db_path=JOURNAL_DB):
+    """Trades whose notes and reflections contain every word of text, best bm25 match first.
+
+    Each hit has the trade ID, its score (lower is better) and a snippet with the matched words in **bold**.
+    """
+    expression = _match_expression(text)
+    if expression is None:
+        return []
+
+    with open_journal(db_path) as conn:
+        # Newest matches first, straight off the index; bm25 is only worth computing for these
+        rows = conn.execute(
+            'SELECT rowid, "ID", bm25(trade_text) FROM trade_text WHERE trade_text MATCH ? '
+            "ORDER BY rowid DESC LIMIT ?",
+            (expression, RANK_WINDOW)
+        ).fetchall()
+
+        best = {}
+        # sorted() is stable, so equal scores keep the newer trade first
+        for seq, trade_id, score in sorted(rows, key=lambda r: r[2]):
+            if trade_id not in best:
+                best[trade_id] = (seq, score)
+                if len(best) == limit:
+                    break
+
+        # One lookup per hit: FTS5 seeks straight to a single rowid but scans for rowid IN (...)
+        snippets = {}
+        for seq, _ in best.values():
+            row = conn.execute(
+                "SELECT snippet(trade_text, -1, '**', '**', '…', 16) FROM trade_text "
+                "WHERE trade_text MATCH ? AND rowid = ?",
+                (expression, seq)
+            ).fetchone()
+            snippets[seq] = row[0] if row else ""
+
+    add_io(read=sum(len(s) for s in snippets.values()))
+    return [
+        {"ID": trade_id, "score": score, "snippet": snippets[seq]}
+        for trade_id, (seq, score) in best.items()
+    ]
+
+
+def _find_column(conn, name):
+    return next((c for c in _table_columns(conn) if c.lower() == name.lower()), None)
+
+
+def _lookup_seqs(conn, name, values):
+    import numpy as np
+
+    column = _find_column(conn, name)
+    if column is None or not values:
+        return np.empty(0, dtype=np.int64)
+    # Answered from the column's index alone, which carries the rowid
+    rows = conn.execute(
+        f"SELECT {SEQ_COLUMN} FROM trades WHERE {_quote(column)} IN ({', '.join('?' for _ in values)})", values
+    ).fetchall()
+    return np.sort(np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows)))
+
+
+def _date_range_seqs(conn, date_from, date_to):
+    import numpy as np
+
+    date_column = _find_column(conn, "Date")
+    if date_column is None:
+        return np.empty(0, dtype=np.int64)
+    where, params = [], []
+    if date_from is not None:
+        where.append(f"{_quote(date_column)} >= ?")
+        params.append(str(date_from))
+    if date_to is not None:
+        where.append(f"{_quote(date_column)} <= ?")
+        params.append(str(date_to))
+    # Answered from the Date index alone, which carries the rowid
+    rows = conn.execute(f"SELECT {SEQ_COLUMN} FROM trades WHERE {' AND '.join(where)}", params).fetchall()
+    return np.sort(np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows)))
+
+
+# Resolved journal path -> object array of trade IDs indexed by _seq. IDs never change once a
+# row is inserted, so the array only grows: each query reads the rows added since the last one.
+_ids_cache = {}
+
+
+def _ids_by_seq(conn, db_path):
+    import numpy as np
+
+    key = os.path.abspath(db_path)
+    ids = _ids_cache.get(key)
+    top = _max_seq(conn)
+    if ids is not None and (ids.size - 1 > top or (ids.size > 1 and _id_at(conn, ids.size - 1) != ids[-1])):
+        # The journal was replaced underneath us
+        ids = None
+    if ids is None:
+        ids = np.empty(1, dtype=object)
+
+    if top >= ids.size:
+        grown = np.empty(top + 1, dtype=object)
+        grown[:ids.size] = ids
+        rows = conn.execute(f'SELECT {SEQ_COLUMN}, "ID" FROM trades WHERE {SEQ_COLUMN} >= ?', (ids.size,)).fetchall()
+        if rows:
+            seqs, values = zip(*rows)
+            grown[list(seqs)] = values
+        ids = grown
+    _ids_cache[key] = ids
+    return ids
+
+
+def _id_at(conn, seq):
+    row = conn.execute(f'SELECT "ID" FROM trades WHERE {SEQ_COLUMN} = ?', (seq,)).fetchone()
+    return row[0] if row else None
+
+
+def _max_day_counter(conn, day):
+    # Range scan on the ID index; only runs the first time a day is allocated
+    ids = conn.execute(
+        'SELECT "ID" FROM trades WHERE "ID" >= ? AND "ID" < ?', (f"{day}-", f"{day}.")
+    ).fetchall()
+    counters = [int(i[0].rsplit("-", 1)[-1]) for i in ids if i[0].rsplit("-", 1)[-1].isdigit()]
+    return max(counters, default=0)
+
+
+def allocate_trade_id(time_str=None, db_path=JOURNAL_DB):
+    """Hand out the next DDMMYYYY-HHMM-NNNNN trade ID from the persisted per-day counter."""
+    now = datetime.now()
+    day = now.strftime("%d%m%Y")
+    time_str = (time_str or now.strftime("%H%M")).replace(":", "")
+
+    # The write transaction serialises allocation across sessions sharing the journal
+    with open_journal(db_path, write=True) as conn:
+        row = conn.execute("SELECT counter FROM id_sequence WHERE day = ?", (day,)).fetchone()
+        counter = (row[0] if row else _max_day_counter(conn, day)) + 1
+        conn.execute("INSERT OR REPLACE INTO id_sequence (day, counter) VALUES (?, ?)", (day, counter))
+
+    return f"{day}-{time_str}-{counter:05d}"
+
+
+def _import_csv(conn, csv_path):
+    with open(csv_path, "r", newline="", encoding="utf-8", errors="replace") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return 0
+
+        _ensure_columns(conn, header)
+        after_seq = _max_seq(conn)
+        width = len(header)
+        version = _next_version(conn)
+        # Blank lines are skipped the same way csv.DictReader does
+        rows = ((row + [""] * width)[:width] + [version] for row in reader if row)
+        count = _insert_rows(conn, header + [VERSION_COLUMN], rows).rowcount
+    _index_rows(conn, after_seq)
+    if _has_text(header):
+        _index_text(conn, f"{SEQ_COLUMN} > ?", (after_seq,))
+
+    # Imported IDs may be ahead of the stored counters; re-seed them lazily from the index
+    conn.execute("DELETE FROM id_sequence")
+    return count
+
+
+def import_csv(csv_path=TRADES_CSV, db_path=JOURNAL_DB):
+    """Import every row of a journal CSV, keeping its column order and any extra columns."""
+    with open_journal(db_path, write=True) as conn:
+        return _import_csv(conn, csv_path)
+
+
+def export_csv(csv_path=TRADES_CSV, db_path=JOURNAL_DB):
+    """Write the journal back out in the CSV layout, rows in insertion order."""
+    with open_journal(db_path) as conn:
+        cols = columns(conn)
+        cur = conn.execute(
+            f"SELECT {', '.join(_quote(c) for c in cols)} FROM trades ORDER BY {SEQ_COLUMN}"
+        )
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(cols)
+            count = 0
+            for row in cur:
+                writer.writerow(["" if v is None else v for v in row])
+                count += 1
+    return count
@@ -0,0 +1,112 @@
+from dataclasses import dataclass, fields
+from typing import Optional
+
+# Record attribute -> journal/CSV column
+COLUMNS = {
+    "trade_id": "ID",
+    "date": "Date",
+    "time": "Time",
+    "instrument": "Instrument",
+    "actual_entry": "Actual Entry",
+    "actual_stop": "Actual Stop",
+    "target_tp": "Target TP",
+    "capital_allocation_pct": "Capital Allocation (%)",
+    "position_size": "Position Size",
+    "used": "Used",
+    "risk": "Risk",
+    "balance": "Balance",
+    "max_rpt_pct": "Max RPT (%)",
+    "actual_rpt_pct": "Actual RPT (%)",
+    "divergence_pct": "Divergence (%)",
+    "r_multiple": "R-Multiple",
+    "mood": "Mood",
+    "strategy": "Strategy",
+    "notes": "Notes",
+    "exit_price": "Exit Price",
+    "exit_time": "Exit Time",
+    "exit_reason": "Exit Reason",
+    "result": "Result",
+    "pnl": "P/L",
+    "final_r_multiple": "Final R-Multiple",
+    "what_went_well": "What Went Well",
+    "what_to_improve": "What to Improve",
+    "closing_notes": "Closing Notes",
+}
+ATTRIBUTES = {column: name for name, column in COLUMNS.items()}
+
+# logic.logic.log_trade writes lowercase fields; map them onto the journal schema
+LEGACY_ALIASES = {
+    "date": "Date",
+    "time": "Time",
+    "entry": "Actual Entry",
+    "stop": "Actual Stop",
+    "take_profit": "Target TP",
+    "position_size": "Position Size",
+    "capital_used": "Used",
+    "risk": "Risk",
+    "account_balance": "Balance",
+    "risk_per_trade": "Max RPT (%)",
+    "r_multiple": "R-Multiple",
+}
+
+
+def _to_float(value):
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(slots=True)
+class TradeRecord:
+    """One journal row with typed fields; amounts are None when not recorded yet."""
+
+    trade_id: str = ""
+    date: str = ""
+    time: str = ""
+    instrument: str = ""
+    actual_entry: Optional[float] = None
+    actual_stop: Optional[float] = None
+    target_tp: Optional[float] = None
+    capital_allocation_pct: Optional[float] = None
+    position_size: Optional[float] = None
+    used: Optional[float] = None
+    risk: Optional[float] = None
+    balance: Optional[float] = None
+    max_rpt_pct: Optional[float] = None
+    actual_rpt_pct: Optional[float] = None
+    divergence_pct: Optional[float] = None
+    r_multiple: Optional[float] = None
+    mood: str = ""
+    strategy: str = ""
+    notes: str = ""
+    exit_price: Optional[float] = None
+    exit_time: str = ""
+    exit_reason: str = ""
+    result: str = ""
+    pnl: Optional[float] = None
+    final_r_multiple: Optional[float] = None
+    what_went_well: str = ""
+    what_to_improve: str = ""
+    closing_notes: str = ""
+
+    @classmethod
+    def from_row(cls, row: dict):
+        """Build a record from a journal/CSV row, including the legacy lowercase layout."""
+        values = {}
+        for key, value in row.items():
+            name = ATTRIBUTES.get(key) or ATTRIBUTES.get(LEGACY_ALIASES.get(key, ""))
+            if name is None or value is None:
+                continue
+            values[name] = _to_float(value) if name in FLOAT_FIELDS else str(value)
+        return cls(**values)
+
+    def to_row(self, columns=None):
+        """Journal/CSV row in column order; pass columns to write only part of the schema."""
+        columns = columns or COLUMNS.values()
+        return {c: getattr(self, ATTRIBUTES[c]) for c in columns}
+
+
+FLOAT_FIELDS = {f.name for f in fields(TradeRecord) if f.type == Optional[float]}
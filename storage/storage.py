@@ -1,13 +1,15 @@
-import os
-import pandas as pd
+import storage.journal as journal
+import storage.writer as writer
+from storage.records import TradeRecord
 
-DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
-TRADES_CSV = os.path.join(DATA_DIR, 'trades.csv')
+def save_trade(trade_dict, db_path=journal.JOURNAL_DB):
+    """Append a trade to the journal from journal columns or the legacy lowercase layout; returns its ID.
 
-def save_trade(trade_dict):
-    os.makedirs(DATA_DIR, exist_ok=True)
-    df = pd.DataFrame([trade_dict])
-    if not os.path.exists(TRADES_CSV):
-        df.to_csv(TRADES_CSV, index=False)
-    else:
-        df.to_csv(TRADES_CSV, mode='a', header=False, index=False)
+    Fields outside the journal schema are dropped, as on CSV import. Rows without an ID get one
+    from the journal's per-day counter.
+    """
+    record = TradeRecord.from_row(trade_dict)
+    if not record.trade_id:
+        record.trade_id = journal.allocate_trade_id(record.time or None, db_path=db_path)
+    writer.append_trade({c: v for c, v in record.to_row().items() if v not in (None, "")}, db_path=db_path)
+    return record.trade_id
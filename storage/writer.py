@@ -0,0 +1,89 @@
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+import storage.journal as journal
+from helpers.profiling import add_io
+
+# Upper bound on operations folded into one transaction
+MAX_BATCH = 512
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+class JournalWriter:
+    """One writer thread per journal; everything queued during a commit goes into the next one.
+
+    Each operation runs in its own savepoint, so a failing update only fails its own caller.
+    """
+
+    def __init__(self, db_path=journal.JOURNAL_DB):
+        self.db_path = db_path
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="journal-writer", daemon=True)
+        self._thread.start()
+
+    def _submit(self, func, *args):
+        future = Future()
+        self._queue.put((func, args, future))
+        return future
+
+    def append(self, row: dict):
+        return self._submit(journal.write_append, row)
+
+    def update(self, trade_id: str, updates: dict):
+        return self._submit(journal.write_update, trade_id, updates)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < MAX_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._commit(batch)
+
+    def _commit(self, batch):
+        outcomes = []
+        try:
+            with journal.open_journal(self.db_path, write=True) as conn:
+                for func, args, future in batch:
+                    conn.execute("SAVEPOINT op")
+                    try:
+                        outcomes.append((future, func(conn, *args), None))
+                        conn.execute("RELEASE op")
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO op")
+                        conn.execute("RELEASE op")
+                        outcomes.append((future, None, e))
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+
+        # Resolve only after COMMIT so callers never observe an unwritten result
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+def get_writer(db_path=journal.JOURNAL_DB):
+    # Keyed by pid too: a forked child inherits the dict but not the writer thread
+    key = (os.getpid(), os.path.abspath(db_path))
+    with _writers_lock:
+        if key not in _writers:
+            _writers[key] = JournalWriter(db_path)
+        return _writers[key]
+
+
+def append_trade(row: dict, db_path=journal.JOURNAL_DB):
+    add_io(written=get_writer(db_path).append(row).result())
+
+
+def update_trade(trade_id: str, updates: dict, db_path=journal.JOURNAL_DB):
+    add_io(written=get_writer(db_path).update(trade_id, updates).result())
@@ -0,0 +1,31 @@
+import numpy as np
+
+import logic.allocation as allocation
+
+
+def test_per_trade_risk_holds_when_one_size_increment_is_several_percent():
+    result = allocation.optimise_allocation([30000], [27900], [40000], [0.6], 10000, 1, 5, 100)
+    assert result["risk"][0] <= 100
+    assert result["position_size"][0] == 0.04
+
+
+def test_exposure_holds_on_high_price_instruments():
+    result = allocation.optimise_allocation([30000, 100], [29000, 99], [40000, 110], [0.6, 0.6], 10000, 1, 5, 20)
+    assert result["capital_used"].sum() <= 2000
+    assert (result["risk"] <= 100).all()
+
+
+def test_random_high_price_setups_stay_within_every_limit():
+    rng = np.random.default_rng(7)
+    for _ in range(200):
+        n = int(rng.integers(1, 6))
+        entries = rng.choice([1.0, 100.0, 3000.0, 30000.0, 60000.0], n) * rng.uniform(0.5, 1.5, n)
+        stops = entries * (1 - rng.uniform(0.005, 0.1, n))
+        targets = entries + (entries - stops) * rng.uniform(0.5, 4, n)
+        balance = float(rng.choice([1000, 10000, 50000]))
+        rpt, open_pct, exposure_pct = rng.uniform(0.5, 2), rng.uniform(1, 6), rng.uniform(5, 60)
+        result = allocation.optimise_allocation(entries, stops, targets, rng.uniform(0.3, 0.8, n), balance,
+                                                rpt, open_pct, exposure_pct)
+        assert (result["risk"] <= balance * rpt / 100 + 1e-6).all()
+        assert result["risk"].sum() <= balance * open_pct / 100 + 1e-6
+        assert result["capital_used"].sum() <= balance * exposure_pct / 100 + 1e-6
@@ -0,0 +1,73 @@
+import os
+import threading
+
+import logic.analytics as analytics
+import storage.journal as journal
+
+
+def _paths(tmp_path):
+    return str(tmp_path / "journal.sqlite3"), str(tmp_path / "analytics.json")
+
+
+def _finalise(db_path, trade_id, pnl, r):
+    journal.update_trade(trade_id, {"P/L": str(pnl), "Final R-Multiple": str(r)}, db_path=db_path)
+
+
+def test_refinalising_adjusts_aggregates_and_survives_reload(tmp_path):
+    db_path, state_path = _paths(tmp_path)
+    for i, pnl in enumerate([100, -50, 30]):
+        journal.append_trade({"ID": f"T{i}", "P/L": str(pnl), "Final R-Multiple": str(abs(pnl) / 50)}, db_path=db_path)
+
+    tracker = analytics.refresh(None, db_path, state_path)
+    assert tracker.summary()["equity_curve"] == [100.0, 50.0, 80.0]
+
+    _finalise(db_path, "T0", -20, 0.4)
+    tracker = analytics.refresh(tracker, db_path, state_path)
+    stats = tracker.summary()
+    assert stats["trades"] == 3
+    assert stats["equity_curve"] == [-20.0, -70.0, -40.0]
+    assert stats["max_drawdown"] == 70.0
+    assert stats["r_distribution"] == {-1.0: 1, -0.5: 1, 0.5: 1}
+
+    assert analytics.load_tracker(state_path).summary() == stats
+
+
+def test_edits_without_new_results_skip_the_save(tmp_path):
+    db_path, state_path = _paths(tmp_path)
+    journal.append_trade({"ID": "T0", "P/L": "10", "Final R-Multiple": "1"}, db_path=db_path)
+    tracker = analytics.refresh(None, db_path, state_path)
+    saved_at = os.stat(state_path).st_mtime_ns
+
+    journal.update_trade("T0", {"Notes": "held too long"}, db_path=db_path)
+    tracker = analytics.refresh(tracker, db_path, state_path)
+
+    assert os.stat(state_path).st_mtime_ns == saved_at
+    assert tracker.version == journal.changed_rows(0, ["ID"], db_path=db_path)[-1][journal.VERSION_COLUMN]
+
+
+def test_concurrent_refreshes_agree_with_the_journal(tmp_path):
+    db_path, state_path = _paths(tmp_path)
+    for i in range(20):
+        journal.append_trade({"ID": f"T{i}"}, db_path=db_path)
+    errors = []
+
+    def session(offset):
+        tracker = None
+        try:
+            for i in range(offset, 20, 4):
+                _finalise(db_path, f"T{i}", i + 1, 1)
+                tracker = analytics.refresh(tracker, db_path, state_path)
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    stats = analytics.refresh(None, db_path, state_path).summary()
+    assert stats["trades"] == 20
+    assert stats["total_pnl"] == sum(range(1, 21))
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
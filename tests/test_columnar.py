@@ -0,0 +1,105 @@
+import os
+import csv
+import threading
+
+import pyarrow as pa
+
+import storage.columnar as columnar
+from storage.records import COLUMNS
+
+HEADER = list(COLUMNS.values())[:20]
+
+
+def _write_ragged_csv(path):
+    # update_trade_row widened the header to 20 columns; log_trade_entry kept appending 16 fields
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerow(["A1", "2024-01-02", "09:30", "ES"] + ["1.5"] * 12 + ["Calm", "Breakout", "note", "101"])
+        writer.writerow(["A2", "2024-01-03", "0930", "NQ"] + ["2"] * 12)
+        writer.writerow(["A3", "2024-01-04", "10:00", "ES"] + ["3"] * 12 + ["Tired", "Scalp", "", "99", "extra"])
+
+
+def test_convert_csv_pads_short_rows_and_cuts_long_ones(tmp_path):
+    csv_path = tmp_path / "trades.csv"
+    _write_ragged_csv(csv_path)
+
+    assert columnar.convert_csv(str(csv_path), str(tmp_path / "trades.arrow")) == 3
+    with pa.memory_map(str(tmp_path / "trades.arrow"), "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+
+    assert table["ID"].to_pylist() == ["A1", "A2", "A3"]
+    assert table[columnar.journal.SEQ_COLUMN].to_pylist() == [1, 2, 3]
+    assert table["Time"].to_pylist() == ["09:30", "0930", "10:00"]
+    # Missing trailing fields are null, as csv.DictReader left them
+    assert table["Mood"].to_pylist() == ["Calm", None, "Tired"]
+    assert table["Exit Price"].to_pylist() == [101.0, None, 99.0]
+
+
+def test_trade_history_from_csv_reads_ragged_rows(tmp_path):
+    csv_path = tmp_path / "trades.csv"
+    _write_ragged_csv(csv_path)
+
+    history = columnar.TradeHistory.from_csv(str(csv_path))
+
+    assert len(history) == 3
+    assert [r.trade_id for r in history] == ["A1", "A2", "A3"]
+    assert history[1].strategy == ""
+    assert history[2].strategy == "Scalp"
+
+
+def _refuse_remove(path):
+    raise PermissionError(path)
+
+
+def test_compact_keeps_segments_a_loaded_table_still_maps(tmp_path, monkeypatch):
+    db_path, sidecar = str(tmp_path / "journal.sqlite3"), str(tmp_path / "journal.arrow")
+    with columnar.journal.open_journal(db_path, write=True) as conn:
+        columnar.journal.write_rows(conn, ["ID", "Mood"], [["A1", "Calm"], ["A2", "Tired"]])
+    columnar.sync(db_path, sidecar)
+    with columnar.journal.open_journal(db_path, write=True) as conn:
+        columnar.journal.write_update(conn, "A1", {"Mood": "Bored"})
+    columnar.sync(db_path, sidecar)
+    loaded = columnar.load_columns(["ID", "Mood"], db_path, sidecar)
+    old_segments = columnar._segments(sidecar)
+
+    # As on Windows, where a memory-mapped file can't be deleted
+    remove = columnar.os.remove
+    monkeypatch.setattr(columnar.os, "remove", _refuse_remove)
+    columnar.compact(db_path, sidecar)
+
+    assert all(os.path.exists(p) for p in old_segments)
+    assert len(columnar._segments(sidecar)) == 1
+    assert columnar.load_columns(["ID", "Mood"], db_path, sidecar).to_pylist() == loaded.to_pylist()
+
+    # Once the maps are gone the next sync deletes the retired segments
+    monkeypatch.setattr(columnar.os, "remove", remove)
+    del loaded
+    columnar.sync(db_path, sidecar)
+    assert not any(os.path.exists(p) for p in old_segments)
+
+
+def test_concurrent_updates_and_syncs_keep_the_sidecar_readable(tmp_path):
+    db_path, sidecar = str(tmp_path / "journal.sqlite3"), str(tmp_path / "journal.arrow")
+    with columnar.journal.open_journal(db_path, write=True) as conn:
+        columnar.journal.write_rows(conn, ["ID", "Mood"], [[f"T{i}", "Calm"] for i in range(6)])
+    errors = []
+
+    def session(i):
+        try:
+            for n in range(15):
+                columnar.journal.update_trade(f"T{i}", {"Mood": f"M{n}"}, db_path=db_path)
+                columnar.sync(db_path, sidecar)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    table = columnar.load_columns(["ID", "Mood"], db_path, sidecar)
+    assert table.to_pylist() == [{"ID": f"T{i}", "Mood": "M14"} for i in range(6)]
+    assert not [p for p in os.listdir(sidecar) if p.endswith(".tmp")]
@@ -0,0 +1,22 @@
+import config.config as config
+
+SESSION_A = {"balance": 10000.0, "risk_percent": 1.0, "max_open_risk": 5.0, "max_exposure": 50.0}
+SESSION_B = {"balance": 25000.0, "risk_percent": 0.5, "max_open_risk": 3.0, "max_exposure": 40.0}
+
+
+def test_sessions_with_different_settings_save_only_their_own_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CONFIG_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "SNAPSHOT_PATH", str(tmp_path / "snapshot.json"))
+    monkeypatch.setattr(config, "HISTORY_PATH", str(tmp_path / "snapshot_history.jsonl"))
+
+    # First runs: each session writes once, as neither matches the file it finds
+    assert config.save_snapshot(SESSION_A)
+    assert config.save_snapshot(SESSION_B)
+    # Reruns leave the file alone while each session's own settings are unchanged
+    for _ in range(5):
+        assert not config.save_snapshot(SESSION_A, SESSION_A)
+        assert not config.save_snapshot(SESSION_B, SESSION_B)
+
+    assert config.save_snapshot({**SESSION_A, "balance": 10500.0}, SESSION_A)
+    assert [e["balance"] for e in config.load_history()] == [10000.0, 25000.0, 10500.0]
+    assert config.load_snapshot()["balance"] == 10500.0
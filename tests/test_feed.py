@@ -0,0 +1,43 @@
+import threading
+import time
+
+import pytest
+
+import logic.feed as feed
+
+
+def _write_ticks(path, prices, seconds_apart):
+    lines = ["time,price,symbol"]
+    lines += [f"2024-01-01T00:00:{i * seconds_apart:02d},{price},BTC" for i, price in enumerate(prices)]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _feed_threads():
+    return [t for t in threading.enumerate() if t.name == "price-feed"]
+
+
+def test_price_feed_needs_batches():
+    with pytest.raises(TypeError):
+        feed.PriceFeed()
+
+
+def test_restart_stops_the_old_replay_before_the_new_one_runs(tmp_path):
+    slow, fast = tmp_path / "slow.csv", tmp_path / "fast.csv"
+    # The slow replay sits in a 30 s wait after its first tick, which stop() has to interrupt
+    _write_ticks(slow, [1.0, 999.0], 30)
+    _write_ticks(fast, [2.0, 3.0], 0)
+
+    live = feed.LivePrices()
+    live.start(feed.ReplayFeed(slow))
+    deadline = time.monotonic() + 5
+    while live.snapshot()[1] < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    old = live._thread
+    live.start(feed.ReplayFeed(fast, speed=0))
+    assert not old.is_alive()
+
+    live._thread.join(timeout=5)
+    assert live.snapshot()[0] == {"BTC": 3.0}
+    assert live.error is None
+    live.stop()
+    assert not _feed_threads()
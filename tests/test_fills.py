@@ -0,0 +1,64 @@
+import csv
+from datetime import datetime, timedelta
+
+import logic.fills as fills
+import storage.journal as journal
+
+FIELDS = ["time", "symbol", "side", "quantity", "price", "stop", "fill_id"]
+
+
+def _write_fills(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDS)
+        writer.writerows(rows)
+
+
+def _journal(db_path):
+    return {row["ID"]: row for row in journal.iter_rows(db_path)}
+
+
+def test_reversal_through_zero_closes_one_trip_and_opens_the_next(tmp_path):
+    fills_path, db_path = str(tmp_path / "fills.csv"), str(tmp_path / "journal.sqlite3")
+    _write_fills(fills_path, [
+        ["2026-01-05 09:30", "ES", "BUY", 2, 100, 98, "f1"],
+        # Sells 2 to go flat and 1 more to open a short
+        ["2026-01-05 10:00", "ES", "SELL", 3, 105, 107, "f2"],
+        ["2026-01-05 11:00", "ES", "BUY", 1, 103, "", "f3"],
+    ])
+
+    summary = fills.import_fills(fills_path, balance=10000, db_path=db_path)
+
+    assert summary == {"imported": 2, "skipped": 0, "open_fills": 0}
+    rows = sorted(_journal(db_path).values(), key=lambda r: r["Time"])
+    assert [(r["Time"], r["Position Size"], r["Actual Entry"], r["Exit Price"], r["P/L"]) for r in rows] == [
+        ("09:30", "2.0", "100.0", "105.0", "10.0"),
+        ("10:00", "1.0", "105.0", "103.0", "2.0"),
+    ]
+    assert [r["Result"] for r in rows] == ["Profit", "Profit"]
+
+
+def test_trips_spanning_chunks_import_once_and_reimport_as_skipped(tmp_path):
+    fills_path, db_path = str(tmp_path / "fills.csv"), str(tmp_path / "journal.sqlite3")
+    start = datetime(2026, 1, 5, 9, 30)
+    rows = []
+    # Three fills per trip, so chunk boundaries of 7 and 13 land inside trips
+    for i in range(100):
+        symbol = ["ES", "NQ"][i % 2]
+        t = start + timedelta(minutes=10 * i)
+        rows += [
+            [t, symbol, "BUY", 1, 100 + i, 99 + i, f"{i}a"],
+            [t + timedelta(minutes=1), symbol, "BUY", 1, 102 + i, "", f"{i}b"],
+            [t + timedelta(minutes=2), symbol, "SELL", 2, 103 + i, "", f"{i}c"],
+        ]
+    _write_fills(fills_path, rows)
+
+    first = fills.import_fills(fills_path, balance=10000, chunk_rows=7, db_path=db_path)
+    again = fills.import_fills(fills_path, balance=10000, chunk_rows=13, db_path=db_path)
+
+    assert first == {"imported": 100, "skipped": 0, "open_fills": 0}
+    assert again == {"imported": 0, "skipped": 100, "open_fills": 0}
+    trades = _journal(db_path)
+    assert len(trades) == 100
+    # Entry averages 101 + i over two units, exit is 103 + i: £4 per trip
+    assert {r["P/L"] for r in trades.values()} == {"4.0"}
@@ -0,0 +1,91 @@
+import csv
+import random
+import sqlite3
+
+import logic.logic as logic
+import storage.journal as journal
+
+STRATEGIES = ["Breakout", "Pullback", "Scalp"]
+MOODS = ["Calm", "Tired", ""]
+INSTRUMENTS = ["ES", "NQ", "BTCUSD", "AAPL", ""]
+
+
+def _expected(db_path, strategy=None, mood=None, instrument=None):
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute('SELECT "ID", "Strategy", "Mood", "Instrument" FROM trades ORDER BY _seq').fetchall()
+    return [r[0] for r in rows if (strategy is None or r[1] in strategy) and (mood is None or r[2] in mood)
+            and (instrument is None or (r[3] in instrument and r[3]))]
+
+
+def test_queries_and_updates_span_bitmap_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal, "BITMAP_CHUNK", 16)
+    db_path = str(tmp_path / "journal.sqlite3")
+    rng = random.Random(3)
+    rows = [[f"T{i:03d}", "2024-01-01", rng.choice(STRATEGIES), rng.choice(MOODS), rng.choice(INSTRUMENTS)]
+            for i in range(40)]
+    with journal.open_journal(db_path, write=True) as conn:
+        journal.write_rows(conn, ["ID", "Date", "Strategy", "Mood", "Instrument"], rows)
+        for i in range(40, 70):
+            journal.write_append(conn, {"ID": f"T{i:03d}", "Strategy": rng.choice(STRATEGIES),
+                                        "Mood": rng.choice(MOODS), "Instrument": rng.choice(INSTRUMENTS)})
+        for i in rng.sample(range(70), 25):
+            journal.write_update(conn, f"T{i:03d}", {"Mood": rng.choice(MOODS), "Strategy": rng.choice(STRATEGIES)})
+
+    for strategy, mood, instrument in [(["Scalp"], None, None), (["Breakout", "Pullback"], ["Calm"], None),
+                                       (None, ["Tired"], ["ES", "BTCUSD"]), (None, None, [""])]:
+        got = journal.query_trade_ids(strategy=strategy, mood=mood, instrument=instrument, db_path=db_path)
+        assert got == _expected(db_path, strategy, mood, instrument)
+
+    # Every chunk is one fixed-size row; no blank labels are indexed
+    with sqlite3.connect(db_path) as conn:
+        assert {r[0] for r in conn.execute("SELECT length(bits) FROM trade_bitmaps")} == {2}
+    assert journal.indexed_values("Mood", db_path) == ["Calm", "Tired"]
+    assert journal.indexed_values("Instrument", db_path) == ["AAPL", "BTCUSD", "ES", "NQ"]
+
+
+def test_clearing_every_row_of_a_value_drops_it_from_the_index(tmp_path):
+    db_path = str(tmp_path / "journal.sqlite3")
+    with journal.open_journal(db_path, write=True) as conn:
+        journal.write_append(conn, {"ID": "A", "Strategy": "Scalp", "Mood": "Calm"})
+        journal.write_update(conn, "A", {"Mood": "Tired"})
+
+    assert journal.indexed_values("Mood", db_path) == ["Tired"]
+    assert journal.query_trade_ids(mood="Calm", db_path=db_path) == []
+
+
+def test_csv_round_trip_keeps_added_columns_and_ragged_rows(tmp_path):
+    source, exported, again = tmp_path / "trades.csv", tmp_path / "export.csv", tmp_path / "again.csv"
+    # A short row and a row with a stray trailing field, as older app versions wrote them
+    source.write_text("ID,Date,Strategy\nA1,2024-01-02,Scalp\nA2,2024-01-03\nA3,2024-01-04,Breakout,extra\n",
+                      encoding="utf-8")
+    db_path, copy_path = str(tmp_path / "journal.sqlite3"), str(tmp_path / "copy.sqlite3")
+
+    assert journal.import_csv(str(source), db_path) == 3
+    journal.append_trade({"ID": "A4", "Strategy": "Scalp", "Exit Price": "101.5"}, db_path=db_path)
+    assert journal.export_csv(str(exported), db_path) == 4
+
+    with open(exported, newline="", encoding="utf-8") as f:
+        assert list(csv.reader(f)) == [
+            ["ID", "Date", "Strategy", "Exit Price"],
+            ["A1", "2024-01-02", "Scalp", ""],
+            ["A2", "2024-01-03", "", ""],
+            ["A3", "2024-01-04", "Breakout", ""],
+            ["A4", "", "Scalp", "101.5"],
+        ]
+
+    assert journal.import_csv(str(exported), copy_path) == 4
+    journal.export_csv(str(again), copy_path)
+    assert again.read_text(encoding="utf-8") == exported.read_text(encoding="utf-8")
+
+
+def test_legacy_log_trade_writes_to_the_journal(tmp_path):
+    db_path = str(tmp_path / "journal.sqlite3")
+    setup = {"time": "10:15", "entry": 100, "stop": 98, "direction": "Long", "position_size": 5,
+             "risk": 10, "capital_used": 500, "take_profit": 106}
+    session = {"balance": 10000, "risk_per_trade": 1.0, "max_open_risk": 5.0, "max_exposure": 50.0}
+
+    trade_id = logic.log_trade(setup, session, "Taken", db_path=db_path)
+
+    row = journal.get_trade(trade_id, db_path)
+    assert trade_id.split("-")[1] == "1015"
+    assert row["Actual Entry"] == "100.0" and row["Target TP"] == "106.0" and row["Balance"] == "10000.0"
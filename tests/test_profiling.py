@@ -0,0 +1,25 @@
+import threading
+
+import helpers.profiling as profiling
+
+
+@profiling.profiled
+def _work():
+    return 1
+
+
+def test_enable_only_switches_the_calling_thread(monkeypatch):
+    monkeypatch.setattr(profiling, "ENABLED", False)
+    profiling.reset()
+
+    def other_session():
+        profiling.enable(True)
+        _work()
+
+    thread = threading.Thread(target=other_session)
+    thread.start()
+    thread.join()
+    _work()
+
+    assert [(r["name"], r["calls"]) for r in profiling.stats()] == [(f"{__name__}._work", 1)]
+    profiling.reset()
@@ -0,0 +1,22 @@
+import cli
+import logic.trade as trade
+import storage.journal as journal
+
+
+def _log_short(db_path, trade_id):
+    # Short 10 units at 100 with the stop at 102: £20 at risk
+    journal.append_trade({"ID": trade_id, "Actual Entry": "100", "Actual Stop": "102",
+                          "Position Size": "10", "Risk": "20"}, db_path=db_path)
+
+
+def test_ui_and_cli_finalise_sign_a_short_winner_the_same_way(tmp_path):
+    db_path = str(tmp_path / "journal.sqlite3")
+    _log_short(db_path, "UI")
+    _log_short(db_path, "CLI")
+
+    assert trade.finalise_trade("UI", 97.0, "15:10", db_path=db_path) == ("Profit", 30.0)
+    assert cli.main(["--db", db_path, "finalise", "CLI", "--exit-price", "97", "--exit-time", "15:10"]) == 0
+
+    for trade_id in ("UI", "CLI"):
+        row = journal.get_trade(trade_id, db_path)
+        assert (row["Result"], row["P/L"], row["Final R-Multiple"]) == ("Profit", "30.0", "1.5")
@@ -1,11 +1,20 @@
 import streamlit as st
 import layout.charts as charts
 import logic.trade as trade
+import logic.missed as missed
+import logic.feed as feed
+import logic.allocation as allocation
 from datetime import datetime
 from helpers.helpers import confidence_message
 from logic.trade import calculate_trade_details
 from helpers.labels import load_labels
+from helpers.profiling import profiled
+from layout.layout import session_profiled
 
+# Seconds between live P/L refreshes; only the live fragment reruns
+LIVE_REFRESH_SECONDS = 1.0
+
+@profiled
 def session_config_panel():
     expanded = not st.session_state.get("session_config_collapsed", False)
 
@@ -16,6 +25,25 @@ def session_config_panel():
         st.number_input("Max Exposure (%)", key="max_exposure", min_value=0.0, max_value=100.0, step=1.0, format="%.2f")
         st.markdown("---")
 
+def keep_trade_inputs(trade_state: dict, trade_id: str):
+    # Streamlit drops state for widgets that are not rendered, so re-assign a hidden trade's
+    # inputs as plain session state; they are picked up again when its tab is reopened
+    prefixes = tuple(f"{p}_" for p in (trade_id, trade_state["data"].get("trade_id")) if p)
+    for key in list(st.session_state.keys()):
+        # Buttons hold bools and cannot be set through session state
+        if key.startswith(prefixes) and not isinstance(st.session_state[key], bool):
+            st.session_state[key] = st.session_state[key]
+
+@st.fragment
+@session_profiled
+def render_trade(trade_state: dict, trade_id: str):
+    st.markdown(f"#### Working on: {trade_state['data'].get('trade_id') or 'new trade (ID assigned when logged)'}")
+    render_trade_setup(trade_state, trade_id)
+    render_trade_logger(trade_state, trade_id)
+    render_trade_live_log(trade_state, trade_id)
+    render_trade_exit_log(trade_state, trade_id)
+
+@profiled
 def render_trade_setup(trade_state: dict, trade_id: str):
     expanded = not trade_state["collapsed"].get("step2", False)
     with st.expander("📌 Step 2: Trade Setup", expanded=expanded):
@@ -54,17 +82,25 @@ def render_trade_setup(trade_state: dict, trade_id: str):
                 f"£{details['risk']:,.2f} ({(details['risk'] / balance * 100):.2f}% / {st.session_state.risk_percent:.2f}%)"
             )
 
-            # Exposure Summary
-            total_exposure = sum(t.get("capital_used", 0) for t in st.session_state.active_trades.values())
-            projected_exposure = total_exposure + details["capital_used"]
-            max_exposure = (st.session_state.max_exposure / 100) * balance
-            exposure_pct = (projected_exposure / balance) * 100
+            # Planned sizing counts against the portfolio until Step 3 records the actual fill
+            ledger = st.session_state.portfolio
+            if not trade_state["data"].get("trade_id"):
+                ledger.set(trade_id, details["risk"], details["capital_used"])
+            room = ledger.headroom(balance, st.session_state.max_open_risk, st.session_state.max_exposure)
 
             st.markdown("### 📈 Exposure Summary")
             st.write(
-                f"Projected Exposure: £{projected_exposure:,.2f} / £{max_exposure:,.2f} "
-                f"({exposure_pct:.2f}% / {st.session_state.max_exposure:.2f}%)"
+                f"Projected Exposure: £{room['exposure']:,.2f} / £{room['max_exposure']:,.2f} "
+                f"({room['exposure'] / balance * 100:.2f}% / {st.session_state.max_exposure:.2f}%)"
+            )
+            st.write(
+                f"Projected Open Risk: £{room['open_risk']:,.2f} / £{room['max_open_risk']:,.2f} "
+                f"({room['open_risk'] / balance * 100:.2f}% / {st.session_state.max_open_risk:.2f}%)"
             )
+            if room["risk_headroom"] < 0:
+                st.error(f"🚫 This setup exceeds Max Open Risk by £{-room['risk_headroom']:,.2f}. It cannot be logged as sized.")
+            if room["exposure_headroom"] < 0:
+                st.warning(f"⚠️ Projected exposure is £{-room['exposure_headroom']:,.2f} over Max Exposure.")
 
             # Ideal Leverage
             actual_rpt = (details["risk"] / balance) * 100
@@ -85,9 +121,16 @@ def render_trade_setup(trade_state: dict, trade_id: str):
             fig = charts.plot_r_multiple_analysis(trade_state["data"], balance)
             st.plotly_chart(fig, use_container_width=True)
 
+            st.markdown("### 🌡️ Stop × Allocation Sensitivity")
+            fig = charts.plot_stop_sensitivity(
+                trade_state["data"], balance, max_rpt, trade_state.setdefault("figures", {})
+            )
+            st.plotly_chart(fig, use_container_width=True)
+
     trade_state["collapsed"]["step2"] = not expanded
 
 
+@profiled
 def render_trade_logger(trade_state: dict, trade_id: str):
     expanded = not trade_state["collapsed"].get("step3", True)
 
@@ -116,6 +159,7 @@ def render_trade_logger(trade_state: dict, trade_id: str):
                 actual_risk = sl_distance * position_size if sl_distance > 0 else 0
                 actual_rpt = (actual_risk / balance) * 100 if balance else 0
                 ideal_leverage = risk_percent / actual_rpt if actual_rpt > 0 else 0
+                actual_capital = round(actual_entry * position_size, 2)
 
                 trade_data = {
                     "entry_date": str(datetime.now().date()),
@@ -135,18 +179,34 @@ def render_trade_logger(trade_state: dict, trade_id: str):
                     "ideal_leverage": round(ideal_leverage, 2)
                 }
 
-                try:
-                    trade_id_logged = trade.log_trade_entry(trade_data)
-                    trade_state["data"]["trade_id"] = trade_id_logged
-                    trade_state["ready_to_log"] = False
-                    trade_state["collapsed"]["step3"] = True
-                    st.success(f"✅ Trade logged successfully (ID: {trade_id_logged})")
-                except Exception as e:
-                    st.error(f"❌ Failed to log trade: {e}")
+                ledger = st.session_state.portfolio
+                if not ledger.allows(trade_id, actual_risk, actual_capital, balance, st.session_state.max_open_risk):
+                    open_risk, _ = ledger.projected(trade_id, actual_risk, actual_capital)
+                    st.error(
+                        f"🚫 Logging this trade would take open risk to £{open_risk:,.2f}, "
+                        f"above Max Open Risk ({st.session_state.max_open_risk:.2f}%)."
+                    )
+                else:
+                    try:
+                        trade_id_logged = trade.log_trade_entry(trade_data)
+                        ledger.set(trade_id, actual_risk, actual_capital)
+                        trade_state["data"]["trade_id"] = trade_id_logged
+                        trade_state["data"].update({
+                            "actual_entry": actual_entry,
+                            "actual_stop": actual_stop,
+                            "target_tp": target_tp,
+                            "instrument": trade_data["instrument"]
+                        })
+                        trade_state["ready_to_log"] = False
+                        trade_state["collapsed"]["step3"] = True
+                        st.success(f"✅ Trade logged successfully (ID: {trade_id_logged})")
+                    except Exception as e:
+                        st.error(f"❌ Failed to log trade: {e}")
 
     trade_state["collapsed"]["step3"] = not expanded
 
 
+@profiled
 def render_trade_live_log(trade_state: dict, trade_id: str):
     expanded = not trade_state["collapsed"].get("step4", False)
 
@@ -196,6 +256,7 @@ def render_trade_live_log(trade_state: dict, trade_id: str):
     # Preserve collapsed state
     trade_state["collapsed"]["step4"] = not expanded
 
+@profiled
 def render_trade_exit_log(trade_state: dict, session_trade_id: str):
     expanded = not trade_state["collapsed"].get("step5", False)
 
@@ -225,24 +286,14 @@ def render_trade_exit_log(trade_state: dict, session_trade_id: str):
 
         if st.button("💾 Finalise and Save Trade", key=f"{csv_trade_id}_save_final"):
             try:
-                # Get required details
-                actual_entry = float(trade_state["data"].get("actual_entry", 0))
-                position_size = float(trade_state["data"].get("position_size", 0))
-                pnl = (float(exit_price) - actual_entry) * position_size if result == "Profit" else (float(exit_price) - actual_entry) * position_size
-                r_multiple = abs(pnl / trade_state["data"].get("risk", 1)) if trade_state["data"].get("risk", 0) != 0 else 0
-                r_multiple = round(r_multiple, 2)
-
-                trade.update_trade_row(csv_trade_id, {
-                    "Exit Price": exit_price,
-                    "Exit Time": exit_time,
-                    "Exit Reason": exit_reason,
-                    "Result": result,
-                    "P/L": round(pnl, 2),
-                    "Final R-Multiple": r_multiple,
+                # P/L and R come from the logged entry, stop, size and risk, as in cli.py finalise
+                trade.finalise_trade(csv_trade_id, exit_price, exit_time, exit_reason, result, {
                     "What Went Well": what_went_well,
                     "What to Improve": what_to_improve,
                     "Closing Notes": closing_notes
                 })
+                st.session_state.portfolio.remove(session_trade_id)
+                trade_state["finalised"] = True
                 st.success(f"✅ Trade finalised and saved successfully (ID: {csv_trade_id})")
                 trade_state["collapsed"]["step5"] = True
 
@@ -251,3 +302,193 @@ def render_trade_exit_log(trade_state: dict, session_trade_id: str):
 
     trade_state["collapsed"]["step5"] = not expanded
 
+
+@profiled
+def missed_trades_panel():
+    with st.expander("🚫 Missed Trades", expanded=False):
+        st.markdown("Log setups you saw but did not take, then replay them against price history.")
+
+        col1, col2, col3 = st.columns(3)
+        entry = col1.number_input("Entry Price", min_value=0.0, format="%.4f", key="missed_entry")
+        stop = col2.number_input("Stop Loss", min_value=0.0, format="%.4f", key="missed_stop")
+        target_tp = col3.number_input("Target Take Profit", min_value=0.0, format="%.4f", key="missed_tp")
+
+        col1, col2, col3 = st.columns(3)
+        entry_date = col1.date_input("Date", key="missed_date")
+        entry_time = col2.text_input("Time (HH:MM)", value="09:30", key="missed_time")
+        instrument = col3.text_input("Instrument", key="missed_instrument")
+
+        contribution_pct = st.slider("Capital Allocation (% of balance)", 0, 25, 10, 1, key="missed_contribution")
+        reason = st.text_input("Why was it missed?", key="missed_reason")
+
+        if st.button("🗒️ Log Missed Trade", key="missed_log"):
+            if entry > 0 and stop > 0 and target_tp > 0:
+                try:
+                    details = missed.log_missed_trade({
+                        "entry_date": str(entry_date),
+                        "entry_time": entry_time,
+                        "instrument": instrument,
+                        "entry": entry,
+                        "stop": stop,
+                        "target_tp": target_tp,
+                        "contribution_pct": contribution_pct,
+                        "reason": reason
+                    }, st.session_state.balance)
+                    st.success(
+                        f"✅ Missed {details['direction']} logged "
+                        f"({details['position_size']:,.2f} units, £{details['risk']:,.2f} risk)"
+                    )
+                except Exception as e:
+                    st.error(f"❌ Failed to log missed trade: {e}")
+            else:
+                st.warning("⚠️ Enter entry, stop and target prices first.")
+
+        st.markdown("---")
+        st.markdown("### 🔁 Replay Against OHLC Bars")
+        bars_path = st.text_input("Bar file (CSV or Parquet with time, open, high, low, close[, symbol])", key="missed_bars_path")
+        horizon = st.number_input("Bars to scan per trade", min_value=1, value=missed.DEFAULT_HORIZON, step=50, key="missed_horizon")
+
+        if st.button("▶️ Simulate Outcomes", key="missed_simulate"):
+            try:
+                st.session_state.missed_simulation = missed.simulate_outcomes(
+                    missed.load_missed_trades(), missed.load_bars(bars_path), int(horizon)
+                )
+            except Exception as e:
+                st.error(f"❌ Failed to simulate missed trades: {e}")
+
+        simulated = st.session_state.get("missed_simulation")
+        if simulated is not None:
+            stats = missed.summarize_outcomes(simulated)
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("🧾 Simulated", f"{stats['trades']}")
+            col2.metric("🎯 Targets / Stops", f"{stats['targets']} / {stats['stops']}")
+            col3.metric("📐 Total R", f"{stats['total_r']:.2f}R")
+            col4.metric("🎲 Expectancy", f"{stats['expectancy']:.2f}R")
+            st.dataframe(simulated, use_container_width=True, hide_index=True)
+
+
+def open_positions():
+    positions = []
+    for trade_state in st.session_state.get("active_trades", {}).values():
+        data = trade_state["data"]
+        if not data.get("trade_id") or trade_state.get("finalised") or "actual_entry" not in data:
+            continue
+        positions.append({
+            "trade_id": data["trade_id"],
+            # Step 4 may have renamed the instrument since entry
+            "symbol": st.session_state.get(f"{data['trade_id']}_instrument") or data.get("instrument"),
+            "entry": data["actual_entry"],
+            "stop": data["actual_stop"],
+            "target": data.get("target_tp"),
+            "size": data.get("position_size", 0),
+        })
+    return positions
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+@session_profiled
+def render_live_positions():
+    live = st.session_state.get("live_prices")
+    positions = open_positions()
+    if live is None or not positions:
+        st.caption("Start a feed and log a trade in Step 3 to see live P/L.")
+        return
+
+    prices, ticks, last_time = live.snapshot()
+    metrics = feed.unrealized(positions, prices)
+    st.caption(
+        f"{ticks:,} ticks received" + (f", last at {last_time:%H:%M:%S}" if last_time else "")
+        + ("" if live.running else " (feed stopped)")
+    )
+    st.dataframe(
+        [{
+            "Trade": p["trade_id"],
+            "Instrument": p["symbol"],
+            "Price": metrics["price"][i],
+            "Unrealized P/L (£)": metrics["pnl"][i],
+            "R": metrics["r"][i],
+            "To Stop (%)": metrics["to_stop_pct"][i],
+            "To Target (%)": metrics["to_target_pct"][i],
+        } for i, p in enumerate(positions)],
+        hide_index=True, use_container_width=True
+    )
+    st.metric("💹 Total Unrealized P/L", f"£{sum(v for v in metrics['pnl'] if v == v):,.2f}")
+
+@profiled
+def live_pnl_panel():
+    with st.expander("📡 Live P/L", expanded=False):
+        col1, col2 = st.columns([3, 1])
+        ticks_path = col1.text_input("Tick file (CSV with time, price[, symbol])", key="live_ticks_path")
+        speed = col2.number_input("Replay speed (× real time, 0 = max)", min_value=0.0, value=1.0, step=0.5, key="live_speed")
+
+        live = st.session_state.setdefault("live_prices", feed.LivePrices())
+        col1, col2 = st.columns(2)
+        if col1.button("▶️ Start Feed", key="live_start"):
+            live.start(feed.ReplayFeed(ticks_path, speed=speed))
+        if col2.button("⏹️ Stop Feed", key="live_stop"):
+            live.stop()
+        if live.error:
+            st.error(f"❌ Feed stopped: {live.error}")
+
+        render_live_positions()
+
+
+ALLOCATION_COLUMNS = ["Instrument", "Entry", "Stop", "Target", "Conviction"]
+
+
+@profiled
+def allocation_panel():
+    with st.expander("🧩 Allocate Several Setups", expanded=False):
+        st.markdown(
+            "Size setups that appear together so the total expected R is as high as possible within "
+            "Risk per Trade, Max Open Risk and Max Exposure, after what open trades already use. "
+            "Conviction is your chance (0–1) of reaching target before the stop."
+        )
+        candidates = st.data_editor(
+            [dict.fromkeys(ALLOCATION_COLUMNS) for _ in range(3)],
+            num_rows="dynamic",
+            use_container_width=True,
+            key="allocation_candidates",
+            column_config={
+                "Instrument": st.column_config.TextColumn(),
+                "Entry": st.column_config.NumberColumn(min_value=0.0, format="%.4f"),
+                "Stop": st.column_config.NumberColumn(min_value=0.0, format="%.4f"),
+                "Target": st.column_config.NumberColumn(min_value=0.0, format="%.4f"),
+                "Conviction": st.column_config.NumberColumn(min_value=0.0, max_value=1.0, step=0.05),
+            }
+        )
+        setups = [c for c in candidates if all(c.get(k) for k in ("Entry", "Stop", "Target")) and c.get("Conviction") is not None]
+        if not setups:
+            st.caption("Enter entry, stop, target and conviction for at least one setup.")
+            return
+
+        balance = st.session_state.balance
+        ledger = st.session_state.portfolio
+        result = allocation.optimise_allocation(
+            [c["Entry"] for c in setups],
+            [c["Stop"] for c in setups],
+            [c["Target"] for c in setups],
+            [c["Conviction"] for c in setups],
+            balance,
+            st.session_state.risk_percent,
+            st.session_state.max_open_risk,
+            st.session_state.max_exposure,
+            open_risk=ledger.open_risk,
+            exposure=ledger.exposure
+        )
+
+        st.dataframe([{
+            "Instrument": c.get("Instrument") or "",
+            "Direction": str(result["direction"][i]),
+            "Expected R": float(result["expected_r"][i]),
+            "Capital Allocation (%)": float(result["contribution_pct"][i]),
+            "Position Size": float(result["position_size"][i]),
+            "Capital Used": float(result["capital_used"][i]),
+            "Risk": float(result["risk"][i]),
+        } for i, c in enumerate(setups)], use_container_width=True, hide_index=True)
+
+        col1, col2, col3 = st.columns(3)
+        risk = float(result["risk"].sum())
+        used = float(result["capital_used"].sum())
+        col1.metric("⚠️ Added Risk", f"£{risk:,.2f}", f"of £{balance * result['risk_headroom_pct'] / 100:,.2f} free", delta_color="off")
+        col2.metric("💸 Added Exposure", f"£{used:,.2f}", f"of £{balance * result['exposure_headroom_pct'] / 100:,.2f} free", delta_color="off")
+        col3.metric("🎲 Expected Gain", f"£{float((result['risk'] * result['expected_r']).sum()):,.2f}")